@@ -18,6 +18,10 @@ import RefreshIcon from '@mui/icons-material/Refresh';
 import CameraAltIcon from '@mui/icons-material/CameraAlt';
 import TextFieldsIcon from '@mui/icons-material/TextFields';
 
+const API_BASE = (import.meta as any).env?.VITE_API_BASE_URL || 'http://localhost:5000';
+// Frame interval for streaming sessions; the server drops frames it cannot keep up with
+const STREAM_FRAME_INTERVAL_MS = 500;
+
 type MediaDeviceInfoLite = Pick<MediaDeviceInfo, 'deviceId' | 'kind' | 'label' | 'groupId'>;
 
 const isSecureContextOrLocalhost = () => {
@@ -42,6 +46,14 @@ const Demo: React.FC = () => {
   const [ocrConfidence, setOcrConfidence] = React.useState<number>(0);
   const canvasRef = React.useRef<HTMLCanvasElement | null>(null);
   const ocrIntervalRef = React.useRef<number | null>(null);
+  const ocrActiveRef = React.useRef<boolean>(false);
+  // Largest image side the server uses (GET /config); frames are downscaled to it before upload
+  const maxSideRef = React.useRef<number>(1280);
+  // Lets the server skip blurred or unchanged frames from this page (X-Session-Id)
+  const sessionIdRef = React.useRef<string>(Math.random().toString(36).slice(2));
+  // Streaming session (POST /stream): frames are pushed, results arrive over Server-Sent Events
+  const ocrSessionRef = React.useRef<{ id: string; frames: string } | null>(null);
+  const eventSourceRef = React.useRef<EventSource | null>(null);
 
   const stopStreamTracks = React.useCallback(() => {
     if (streamRef.current) {
@@ -168,9 +180,11 @@ const Demo: React.FC = () => {
   // Cleanup OCR on unmount
   React.useEffect(() => {
     return () => {
+      ocrActiveRef.current = false;
       if (ocrIntervalRef.current) {
         clearTimeout(ocrIntervalRef.current);
       }
+      eventSourceRef.current?.close();
     };
   }, []);
 
@@ -239,31 +253,34 @@ const Demo: React.FC = () => {
   };
 
   // Real OCR using Tesseract.js (same engine as your Python backend)
-  const performOCR = async (imageDataUrl: string): Promise<{ text: string; confidence: number }[]> => {
+  const performOCR = async (image: Blob): Promise<{ text: string; confidence: number }[]> => {
     try {
       setOcrProcessing(true);
       
       console.log('🔍 Starting real OCR processing...');
       
-      // Call your Python backend for real OCR
-      const formData = new FormData();
-      const response = await fetch(imageDataUrl);
-      const blob = await response.blob();
-      formData.append('image', blob, 'capture.jpg');
-
-      const API_BASE = (import.meta as any).env?.VITE_API_BASE_URL || 'http://localhost:5000';
+      // Send the JPEG as the raw request body (no data URL or multipart encoding)
       const apiResponse = await fetch(`${API_BASE}/ocr`, {
         method: 'POST',
-        body: formData
+        headers: {
+          'Content-Type': image.type || 'image/jpeg',
+          'X-Session-Id': sessionIdRef.current
+        },
+        body: image
       });
       
       if (!apiResponse.ok) {
         throw new Error('OCR API call failed');
       }
       
+      const maxSide = Number(apiResponse.headers.get('X-Max-Side'));
+      if (maxSide > 0) {
+        maxSideRef.current = maxSide;
+      }
+      
       const ocrData = await apiResponse.json();
       
-      console.log('✅ OCR completed:', ocrData.text);
+      console.log('✅ OCR completed:', ocrData.skipped ? `(skipped: ${ocrData.skipped})` : ocrData.text);
       
       // Process the recognized text
       const lines = ocrData.text
@@ -300,34 +317,112 @@ const Demo: React.FC = () => {
     }
   };
 
-  const captureFrame = (): string | null => {
-    if (!videoRef.current || !canvasRef.current) return null;
+  const captureFrame = (): Promise<Blob | null> => {
+    if (!videoRef.current || !canvasRef.current) return Promise.resolve(null);
     
     const video = videoRef.current;
     const canvas = canvasRef.current;
     const ctx = canvas.getContext('2d');
     
-    if (!ctx) return null;
+    if (!ctx || !video.videoWidth) return Promise.resolve(null);
     
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
-    ctx.drawImage(video, 0, 0);
+    // Downscale while drawing so we never upload more pixels than the server uses
+    const scale = Math.min(1, maxSideRef.current / Math.max(video.videoWidth, video.videoHeight));
+    canvas.width = Math.round(video.videoWidth * scale);
+    canvas.height = Math.round(video.videoHeight * scale);
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
     
-    return canvas.toDataURL('image/jpeg', 0.8);
+    return new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.8));
+  };
+
+  const startStream = async (): Promise<boolean> => {
+    try {
+      const response = await fetch(`${API_BASE}/stream?mode=ocr`, { method: 'POST' });
+      if (!response.ok) {
+        throw new Error(`Stream API returned ${response.status}`);
+      }
+      const session = await response.json();
+      ocrSessionRef.current = { id: session.session_id, frames: session.frames };
+      
+      const events = new EventSource(`${API_BASE}${session.events}`);
+      eventSourceRef.current = events;
+      events.onmessage = (message) => {
+        const data = JSON.parse(message.data);
+        if (data.type === 'ocr') {
+          // Only lines the server has not sent before arrive in new_lines
+          const lines = data.new_lines
+            .map((line: string) => line.trim())
+            .filter((line: string) => line.length > 2);
+          if (lines.length > 0) {
+            setOcrResults(prev => [...new Set([...prev, ...lines])]);
+          }
+          setOcrConfidence(data.confidence / 100);
+        } else if (data.type === 'error') {
+          console.warn('⚠️ Stream error:', data.error);
+        }
+      };
+      events.onerror = () => console.warn('⚠️ Stream connection interrupted, browser will retry');
+      
+      console.log('📡 Streaming session started:', session.session_id);
+    } catch (err) {
+      console.warn('Streaming unavailable, falling back to polling', err);
+      return false;
+    }
+    
+    const pushFrame = async () => {
+      const session = ocrSessionRef.current;
+      if (!ocrActiveRef.current || !session) return;
+      
+      const image = await captureFrame();
+      if (image) {
+        try {
+          await fetch(`${API_BASE}${session.frames}`, {
+            method: 'POST',
+            headers: { 'Content-Type': image.type || 'image/jpeg' },
+            body: image
+          });
+        } catch (err) {
+          console.warn('Frame upload failed', err);
+        }
+      }
+      
+      if (ocrActiveRef.current) {
+        ocrIntervalRef.current = window.setTimeout(pushFrame, STREAM_FRAME_INTERVAL_MS);
+      }
+    };
+    
+    pushFrame();
+    return true;
   };
 
   const startOCR = async () => {
     if (!videoRef.current) return;
     
     setIsOcrActive(true);
+    ocrActiveRef.current = true;
     setOcrResults([]);
     
+    try {
+      const config = await (await fetch(`${API_BASE}/config`)).json();
+      if (config.max_side) {
+        maxSideRef.current = config.max_side;
+      }
+    } catch (err) {
+      console.warn('Could not read /config, using default upload size', err);
+    }
+    
+    if (await startStream()) {
+      return;
+    }
+    
+    // Fallback: one HTTP request per frame
+    // Read through a ref: the state value captured by this closure never updates
     const processFrame = async () => {
-      if (!isOcrActive) return;
+      if (!ocrActiveRef.current) return;
       
-             const imageData = captureFrame();
-       if (imageData) {
-         const results = await performOCR(imageData);
+      const image = await captureFrame();
+      if (image) {
+        const results = await performOCR(image);
         
         if (results.length > 0) {
           const texts = results.map(r => r.text);
@@ -339,7 +434,7 @@ const Demo: React.FC = () => {
       }
       
       // Continue processing every 3 seconds
-      if (isOcrActive) {
+      if (ocrActiveRef.current) {
         ocrIntervalRef.current = window.setTimeout(processFrame, 3000);
       }
     };
@@ -349,10 +444,17 @@ const Demo: React.FC = () => {
 
   const stopOCR = () => {
     setIsOcrActive(false);
+    ocrActiveRef.current = false;
     if (ocrIntervalRef.current) {
       clearTimeout(ocrIntervalRef.current);
       ocrIntervalRef.current = null;
     }
+    eventSourceRef.current?.close();
+    eventSourceRef.current = null;
+    if (ocrSessionRef.current) {
+      fetch(`${API_BASE}/stream/${ocrSessionRef.current.id}`, { method: 'DELETE' }).catch(() => undefined);
+      ocrSessionRef.current = null;
+    }
   };
 
   return (
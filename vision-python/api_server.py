@@ -1,60 +1,375 @@
-from flask import Flask, request, jsonify
+from startup import LOADING, Readiness
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import cv2
-import pytesseract
 import numpy as np
-from PIL import Image
+import argparse
+import atexit
+import collections
+import functools
 import io
-import base64
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
+import ocr_engine
+import detector
+import preprocessing
+from frame_ring import SharedFrameRing
+from metrics import PROFILING_ENABLED, Registry, SamplingProfiler
+from result_cache import ResultCache, bytes_digest, image_digest, near_signature
+from frame_gate import BLURRY, CHANGED, UNCHANGED, SessionGates
+from stream_session import SessionLimitError, SessionRegistry
 
-# Set the Tesseract path for Windows
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# Serving limits (override with environment variables)
+MAX_INFLIGHT = int(os.environ.get('API_MAX_INFLIGHT', 32))
+WORK_THREADS = int(os.environ.get('API_WORK_THREADS', (os.cpu_count() or 2) * 2))
+WORK_TIMEOUT = float(os.environ.get('API_WORK_TIMEOUT', 20))
+OCR_PROCESSES = int(os.environ.get('API_OCR_PROCESSES', 0))  # >0: OCR in worker processes via shared memory
+
+# Uploads (override with environment variables)
+MAX_SIDE = int(os.environ.get('API_MAX_SIDE', 1280))  # larger images are downscaled; advertised to clients
+MAX_UPLOAD_BYTES = int(float(os.environ.get('API_MAX_UPLOAD_MB', 16)) * 1024 * 1024)
+GRAY8_TYPE = 'application/x-gray8'  # raw 8-bit greyscale pixels, size in X-Width / X-Height
+
+# Batch uploads to /ocr/batch and /detect/batch (override with environment variables)
+MAX_BATCH_ITEMS = int(os.environ.get('API_MAX_BATCH_ITEMS', 32))
+MAX_BATCH_BYTES = int(float(os.environ.get('API_MAX_BATCH_MB', 64)) * 1024 * 1024)
+BATCH_PARALLEL = int(os.environ.get('API_BATCH_PARALLEL', max(1, WORK_THREADS // 2)))  # leave threads for /ocr
+BATCH_TIMEOUT = float(os.environ.get('API_BATCH_TIMEOUT', 60))
+ARCHIVE_TYPES = ('application/zip', 'application/x-zip-compressed')
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=['X-Max-Side'])  # Enable CORS for all routes; let browsers read X-Max-Side
+
+# Image work runs here so request threads stay free for /health
+work_executor = ThreadPoolExecutor(max_workers=WORK_THREADS, thread_name_prefix='api-work')
+inflight_slots = threading.BoundedSemaphore(MAX_INFLIGHT)
+
+# Results for repeated / near-identical frames (e.g. the Demo page re-posting a static scene)
+result_cache = ResultCache()
+
+# Streaming clients send X-Session-Id; their blurred or unchanged frames skip OCR/YOLO
+session_gates = SessionGates()
+EMPTY_RESULTS = {'ocr': ocr_engine.empty_result, 'detect': list}
+
+# OCR only needs luminance, so its uploads are decoded straight to greyscale
+DECODE_FLAGS = {'ocr': cv2.IMREAD_GRAYSCALE, 'detect': cv2.IMREAD_COLOR}
+
+# Per request thread, grown on demand and reused for every raw body
+_body_buffers = threading.local()
+
+# OCR and YOLO load in the background at startup; /health answers meanwhile, /ready once they are loaded
+readiness = Readiness()
+
+# Prometheus-style metrics at /metrics; the sampling profiler is opt-in (API_PROFILING=1)
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram('vision_request_seconds', 'Request latency by endpoint', ['endpoint'])
+REQUESTS = metrics.counter('vision_requests_total', 'Requests by endpoint and status', ['endpoint', 'status'])
+ERRORS = metrics.counter('vision_request_errors_total', 'Requests answered with 4xx/5xx', ['endpoint', 'status'])
+STAGE_SECONDS = metrics.histogram('vision_stage_seconds', 'Time per processing stage (decode, preprocess, ocr, detect)',
+                                  ['stage'])
+INFLIGHT = metrics.gauge('vision_inflight_requests', 'OCR/detection requests being processed')
+BATCH_ITEMS = metrics.histogram('vision_batch_items', 'Images per batch request', ['endpoint'],
+                                buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_RESULTS = metrics.counter('vision_batch_item_results_total', 'Batch items by outcome', ['endpoint', 'outcome'])
+profiler = SamplingProfiler()
+
+
+def limit_inflight(view):
+    """Reject requests with 503 straight away once MAX_INFLIGHT are being processed"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not inflight_slots.acquire(blocking=False):
+            response = jsonify({'error': 'Server is busy, please retry', 'success': False})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        INFLIGHT.inc()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            INFLIGHT.dec()
+            inflight_slots.release()
+    return wrapper
+
+
+def run_work(fn, *args):
+    """Run CPU-heavy work on the executor, bounded by WORK_TIMEOUT"""
+    future = work_executor.submit(fn, *args)
+    try:
+        return future.result(timeout=WORK_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise ocr_engine.OCRTimeoutError("Image processing timed out")
+
+
+@app.after_request
+def advertise_limits(response):
+    """Tell clients the largest useful image side so they downscale before uploading"""
+    response.headers['X-Max-Side'] = str(MAX_SIDE)
+    return response
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Count and time every request by route (the rule, so session ids do not become labels)"""
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    status = str(response.status_code)
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, status=status)
+    if response.status_code >= 400:
+        ERRORS.inc(endpoint=endpoint, status=status)
+    return response
+
+
+def read_body():
+    """Read the raw request body into this thread's reusable buffer; returns a memoryview"""
+    length = request.content_length
+    if not length:
+        raise ValueError('Empty request body')
+    if length > MAX_UPLOAD_BYTES:
+        raise ValueError(f'Upload larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+    buffer = getattr(_body_buffers, 'buffer', None)
+    if buffer is None or len(buffer) < length:
+        buffer = bytearray(max(length, 1 << 20))
+        _body_buffers.buffer = buffer
+    view = memoryview(buffer)[:length]
+    received = 0
+    while received < length:
+        count = request.stream.readinto(view[received:])
+        if not count:
+            raise ValueError('Incomplete request body')
+        received += count
+    return view
+
+
+def read_upload():
+    """Return (payload, shape) for the request's image.
+
+    Accepts a multipart `image` field, a raw image/* or octet-stream body, or
+    GRAY8_TYPE pixels; shape is (height, width) for the latter and None for
+    encoded images.
+    """
+    mimetype = request.mimetype
+    if mimetype == GRAY8_TYPE:
+        try:
+            width, height = int(request.headers['X-Width']), int(request.headers['X-Height'])
+        except (KeyError, ValueError):
+            raise ValueError('X-Width and X-Height headers are required for ' + GRAY8_TYPE)
+        payload = read_body()
+        if width <= 0 or height <= 0 or len(payload) != width * height:
+            raise ValueError('Body size does not match X-Width x X-Height')
+        return payload, (height, width)
+    if mimetype.startswith('image/') or mimetype == 'application/octet-stream':
+        return read_body(), None
+    if 'image' not in request.files:
+        raise ValueError('No image file provided')
+    return request.files['image'].read(), None
+
+
+def decode_image(payload, shape=None, flags=cv2.IMREAD_COLOR):
+    """Decode an upload (BGR, or greyscale with IMREAD_GRAYSCALE) no larger than MAX_SIDE.
+
+    Returns (image, scale), scale being the decoded size over the upload's
+    (below 1.0 when the upload was downscaled).
+    """
+    with STAGE_SECONDS.time(stage='decode'):
+        return _decode(payload, shape, flags)
+
+
+def _decode(payload, shape, flags):
+    if shape is not None:
+        image = np.frombuffer(payload, np.uint8).reshape(shape)
+        if flags != cv2.IMREAD_GRAYSCALE:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    else:
+        image = cv2.imdecode(np.frombuffer(payload, np.uint8), flags)
+        if image is None:
+            raise ValueError('Could not decode image')
+    scale = MAX_SIDE / max(image.shape[:2])
+    if scale >= 1.0:
+        return image, 1.0
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def _scale_box(bbox, factor):
+    return tuple(int(round(v * factor)) for v in bbox)
+
+
+def to_upload_coords(namespace, result, scale):
+    """Map the boxes of an OCR or detection result from the decoded image back to the upload's pixels"""
+    if scale == 1.0:
+        return result
+    factor = 1.0 / scale
+    if namespace == 'ocr':
+        return {**result, 'words': [{**w, 'bbox': _scale_box(w['bbox'], factor)} for w in result['words']]}
+    return [{**obj, 'bbox': _scale_box(obj['bbox'], factor)} for obj in result]
+
+
+def session_gate(namespace):
+    """(FrameGate, session id) for the request's X-Session-Id header, (None, None) for one-off uploads"""
+    session_id = request.headers.get('X-Session-Id')
+    if not session_id:
+        return None, None
+    return session_gates.get((namespace, session_id)), session_id
+
+
+def cached_work(namespace, payload, compute, gate=None, shape=None, session=None):
+    """Run compute(image) for an upload, serving repeats from the result cache.
+
+    Identical upload bytes are answered before decoding; otherwise the
+    decoded pixels are matched exactly or, within the same session, as a
+    near-duplicate (when CACHE_NEAR_DISTANCE is set). With a session gate,
+    blurred frames get an empty result and unchanged frames the session's
+    previous one. Returns (result, cached, skipped) where skipped
+    is None, 'blurry' or 'unchanged'.
+    """
+    raw_key = bytes_digest(payload) + (f':{shape[1]}x{shape[0]}' if shape else '')
+    result = result_cache.get(namespace, key=raw_key, count_miss=False)
+    if result is not None:
+        return result, True, None
+    # The payload may be a view of this thread's body buffer, which stays
+    # untouched while we wait here; decoding is the first thing the job does
+    try:
+        return run_work(_decode_and_compute, namespace, raw_key, payload, shape, compute, gate, session)
+    except ocr_engine.OCRTimeoutError:
+        # The job may still be reading the payload: leave that buffer to it and
+        # give this thread a fresh one, so the next request cannot overwrite it
+        if isinstance(payload, memoryview):
+            _body_buffers.buffer = None
+        raise
+
+
+def _decode_and_compute(namespace, raw_key, payload, shape, compute, gate, session=None):
+    image, scale = decode_image(payload, shape, DECODE_FLAGS[namespace])
+    if gate is not None:
+        state = gate.check(image)
+        if state == BLURRY:
+            return EMPTY_RESULTS[namespace](), False, BLURRY
+        if state == UNCHANGED and gate.last_result is not None:
+            return gate.last_result, True, UNCHANGED
+    # Results are cached in upload coordinates, so the key includes the downscale factor
+    key = image_digest(image) + (f'@{scale:.6f}' if scale != 1.0 else '')
+    size = (image.shape, scale)
+    near = near_signature(image) if session is not None and result_cache.near_distance > 0 else None
+    result = result_cache.get(namespace, key=key, near=near, session=session, shape=size)
+    if result is None:
+        result = to_upload_coords(namespace, compute(image), scale)
+        result_cache.put(namespace, [key, raw_key], result, near=near, session=session, shape=size)
+        cached = False
+    else:
+        cached = True
+    if gate is not None:
+        gate.last_result = result
+    return result, cached, None
+
+
+# OCR worker processes (API_OCR_PROCESSES > 0); decoded images reach them through a shared frame ring
+_process_ocr = None
+_process_ocr_lock = threading.Lock()
+
+
+def get_process_ocr():
+    """Process OCR pool, started on first use; None when API_OCR_PROCESSES is 0"""
+    global _process_ocr
+    if OCR_PROCESSES <= 0:
+        return None
+    with _process_ocr_lock:
+        if _process_ocr is None:
+            # One slot per work thread (each has at most one image in OCR), plus spares
+            ring = SharedFrameRing(slots=WORK_THREADS + 2, max_shape=(MAX_SIDE, MAX_SIDE))
+            _process_ocr = ocr_engine.ProcessOCRPool(OCR_PROCESSES, ring)
+            atexit.register(_stop_process_ocr)
+        return _process_ocr
+
+
+def _stop_process_ocr():
+    _process_ocr.close()
+    _process_ocr.ring.close()
+    _process_ocr.ring.unlink()
+
+
+_loading_started = False
+_loading_lock = threading.Lock()
+
+
+def start_loading():
+    """Load and warm up OCR and YOLO in the background, once per process"""
+    global _loading_started
+    with _loading_lock:
+        if _loading_started:
+            return
+        _loading_started = True
+    if OCR_PROCESSES > 0:
+        readiness.load('ocr', lambda: get_process_ocr().warm_up())
+    else:
+        readiness.load('ocr', ocr_engine.warm_up)
+    readiness.load('detector', detector.get_batcher, required=False)
+
+
+def ocr_image(image, block=False):
+    """Preprocess and OCR one decoded image (block: wait for OCR queue slots instead of failing busy)"""
+    # Preprocess the image for better OCR
+    # Convert to grayscale (uploads to /ocr are usually decoded as greyscale already)
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    process_ocr = get_process_ocr()
+    if process_ocr is not None:
+        # Same pipeline in a worker process; the image is copied into shared memory once, never pickled
+        with STAGE_SECONDS.time(stage='ocr'):
+            return process_ocr.recognize(gray, psm=6, block=block)
+
+    # Locate text first and OCR only those regions, in parallel on the worker pool.
+    # Each crop is rescaled to Tesseract's preferred text height, deskewed and
+    # thresholded on its own (preprocessing.py), which also suits uneven lighting
+    preprocess_seconds = 0.0
+
+    def prepare(crop):
+        nonlocal preprocess_seconds
+        start = time.perf_counter()
+        try:
+            return preprocessing.prepare_for_ocr(crop)
+        finally:
+            preprocess_seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = ocr_engine.recognize_text(gray, psm=6, preprocess=prepare, block=block)
+    STAGE_SECONDS.observe(preprocess_seconds, stage='preprocess')
+    STAGE_SECONDS.observe(time.perf_counter() - start - preprocess_seconds, stage='ocr')
+    return result
 
 @app.route('/ocr', methods=['POST'])
+@limit_inflight
 def ocr_endpoint():
     try:
-        # Get the image file from the request
-        if 'image' not in request.files:
-            return jsonify({'error': 'No image file provided'}), 400
-        
-        file = request.files['image']
-        
-        # Read the image
-        image_bytes = file.read()
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Preprocess the image for better OCR
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply thresholding to get black text on white background
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Apply some noise reduction
-        denoised = cv2.medianBlur(thresh, 3)
-        
-        # Perform OCR
-        text = pytesseract.image_to_string(denoised, config='--psm 6')
-        
-        # Get confidence score (average confidence)
-        confidence_data = pytesseract.image_to_data(denoised, output_type=pytesseract.Output.DICT)
-        confidences = [int(conf) for conf in confidence_data['conf'] if int(conf) > 0]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-        
-        # Clean up the text
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+        # Get the image from the request (multipart, raw image body or gray8 pixels)
+        payload, shape = read_upload()
+
+        gate, session = session_gate('ocr')
+        result, cached, skipped = cached_work('ocr', payload, ocr_image, gate, shape, session)
+
         return jsonify({
-            'text': '\n'.join(lines),
-            'confidence': avg_confidence,
-            'lines': lines,
+            'text': result['text'],
+            'confidence': result['confidence'],
+            'lines': result['lines'],
+            'words': result['words'],
+            'cached': cached,
+            'skipped': skipped,
             'success': True
         })
-        
+
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except (ocr_engine.OCRBusyError, ocr_engine.OCRUnavailableError) as e:
+        return jsonify({'error': str(e), 'success': False}), 503
+    except ocr_engine.OCRTimeoutError as e:
+        return jsonify({'error': str(e), 'success': False}), 504
     except Exception as e:
         print(f"OCR Error: {str(e)}")
         return jsonify({
@@ -62,13 +377,389 @@ def ocr_endpoint():
             'success': False
         }), 500
 
+def detect_image(image):
+    """Run one decoded image through the shared detection batcher"""
+    if readiness.state('detector') == LOADING:
+        raise detector.DetectorBusyError('Object detection is still loading, please retry')
+    batcher = detector.get_batcher()
+    if batcher is None:
+        raise detector.DetectorBusyError('Object detection is not available')
+    with STAGE_SECONDS.time(stage='detect'):
+        return batcher.detect(image)
+
+@app.route('/detect', methods=['POST'])
+@limit_inflight
+def detect_endpoint():
+    try:
+        payload, shape = read_upload()
+        gate, session = session_gate('detect')
+        objects, cached, skipped = cached_work('detect', payload, detect_image, gate, shape, session)
+
+        return jsonify({
+            'objects': objects,
+            'count': len(objects),
+            'cached': cached,
+            'skipped': skipped,
+            'success': True
+        })
+
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except detector.DetectorBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
+    except (detector.DetectorTimeoutError, ocr_engine.OCRTimeoutError) as e:
+        return jsonify({'error': str(e), 'success': False}), 504
+    except Exception as e:
+        print(f"Detection Error: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 500
+
+def read_archive(data):
+    """(name, bytes) for every file in a zip archive, in archive order"""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError('Not a valid zip archive')
+    with archive:
+        entries = [info for info in archive.infolist() if not info.is_dir()
+                   and not info.filename.startswith('__MACOSX/')
+                   and not os.path.basename(info.filename).startswith('.')]
+        if len(entries) > MAX_BATCH_ITEMS:
+            raise ValueError(f'At most {MAX_BATCH_ITEMS} images per batch')
+        # Sizes come from the archive directory, so check them before inflating anything
+        if any(info.file_size > MAX_UPLOAD_BYTES for info in entries):
+            raise ValueError(f'Archive entry larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+        if sum(info.file_size for info in entries) > MAX_BATCH_BYTES:
+            raise ValueError(f'Archive contents larger than {MAX_BATCH_BYTES // (1024 * 1024)} MB')
+        return [(info.filename, archive.read(info)) for info in entries]
+
+
+def read_batch():
+    """Return [(name, payload)] for a batch upload, in the order sent.
+
+    Accepts multipart with any number of file fields (each file is one item;
+    zip files are expanded in place) or a zip archive as the request body.
+    """
+    length = request.content_length
+    if not length:
+        raise ValueError('Empty request body')
+    if length > MAX_BATCH_BYTES:
+        raise ValueError(f'Batch larger than {MAX_BATCH_BYTES // (1024 * 1024)} MB')
+    if request.mimetype in ARCHIVE_TYPES:
+        items = read_archive(request.get_data())
+    else:
+        items = []
+        for field, upload in request.files.items(multi=True):
+            if upload.mimetype in ARCHIVE_TYPES or (upload.filename or '').lower().endswith('.zip'):
+                items.extend(read_archive(upload.read()))
+            else:
+                items.append((upload.filename or field, upload.read()))
+    if not items:
+        raise ValueError('No images provided')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f'At most {MAX_BATCH_ITEMS} images per batch')
+    return items
+
+
+def batch_work(namespace, payloads, compute):
+    """Run compute on every payload concurrently; returns (result, cached) or an exception per item, in order.
+
+    Repeats are answered from the result cache without decoding. At most
+    BATCH_PARALLEL items are on the work executor at once so single-image
+    requests still get threads; items not finished by BATCH_TIMEOUT fail
+    with a timeout.
+    """
+    results = [None] * len(payloads)
+    waiting = collections.deque(enumerate(payloads))
+    pending = {}
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while waiting or pending:
+        while waiting and len(pending) < BATCH_PARALLEL:
+            index, payload = waiting.popleft()
+            raw_key = bytes_digest(payload)
+            result = result_cache.get(namespace, key=raw_key, count_miss=False)
+            if result is not None:
+                results[index] = (result, True)
+                continue
+            future = work_executor.submit(_decode_and_compute, namespace, raw_key, payload, None, compute, None)
+            pending[future] = index
+        if not pending:
+            continue
+        done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            index = pending.pop(future)
+            try:
+                result, cached, _ = future.result()
+                results[index] = (result, cached)
+            except Exception as e:
+                results[index] = e
+    for future, index in pending.items():
+        future.cancel()
+        results[index] = ocr_engine.OCRTimeoutError('Batch timed out before this image was processed')
+    for index, _ in waiting:
+        results[index] = ocr_engine.OCRTimeoutError('Batch timed out before this image was processed')
+    return results
+
+
+def batch_error(e):
+    """(status, message) for a failed batch item, matching the single-image endpoints"""
+    if isinstance(e, ValueError):
+        return 400, str(e)
+    if isinstance(e, (ocr_engine.OCRBusyError, ocr_engine.OCRUnavailableError, detector.DetectorBusyError)):
+        return 503, str(e)
+    if isinstance(e, (ocr_engine.OCRTimeoutError, detector.DetectorTimeoutError)):
+        return 504, str(e)
+    print(f"Batch item Error: {str(e)}")
+    return 500, str(e)
+
+
+@app.route('/ocr/batch', methods=['POST'])
+@app.route('/detect/batch', methods=['POST'])
+@limit_inflight
+def batch_endpoint():
+    """OCR (or detect objects in) several images from one multipart or zip upload.
+
+    Items are decoded, preprocessed and recognised concurrently; the response
+    lists one result per image in upload order, and a failed image is
+    reported in its own entry without failing the rest.
+    """
+    namespace = 'detect' if request.path.startswith('/detect') else 'ocr'
+    endpoint = request.url_rule.rule
+    try:
+        items = read_batch()
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    BATCH_ITEMS.observe(len(items), endpoint=endpoint)
+
+    # Admitted as one request, so OCR crops wait for queue slots rather than failing busy
+    compute = functools.partial(ocr_image, block=True) if namespace == 'ocr' else detect_image
+    outcomes = batch_work(namespace, [payload for _, payload in items], compute)
+
+    results = []
+    for index, ((name, _), outcome) in enumerate(zip(items, outcomes)):
+        entry = {'index': index, 'name': name}
+        if isinstance(outcome, Exception):
+            entry['status'], entry['error'] = batch_error(outcome)
+            entry['success'] = False
+        elif namespace == 'ocr':
+            result, cached = outcome
+            entry.update(text=result['text'], confidence=result['confidence'], lines=result['lines'],
+                         words=result['words'], cached=cached, success=True)
+        else:
+            objects, cached = outcome
+            entry.update(objects=objects, count=len(objects), cached=cached, success=True)
+        BATCH_RESULTS.inc(endpoint=endpoint, outcome='ok' if entry['success'] else 'error')
+        results.append(entry)
+
+    failed = sum(1 for entry in results if not entry['success'])
+    return jsonify({
+        'results': results,
+        'count': len(results),
+        'failed': failed,
+        'success': True
+    })
+
+def _stream_frame(mode, payload, shape, gate):
+    """Decode and analyse one streamed frame; returns BLURRY, UNCHANGED or (ocr, objects)"""
+    image, scale = decode_image(payload, shape, cv2.IMREAD_GRAYSCALE if mode == 'ocr' else cv2.IMREAD_COLOR)
+    state = gate.check(image)
+    if state != CHANGED:
+        return state
+    ocr = to_upload_coords('ocr', ocr_image(image), scale) if mode in ('ocr', 'both') else None
+    objects = to_upload_coords('detect', detect_image(image), scale) if mode in ('detect', 'both') else None
+    return ocr, objects
+
+
+def stream_process(mode, payload, shape, gate):
+    return run_work(_stream_frame, mode, payload, shape, gate)
+
+
+# Live sessions: frames are POSTed to /stream/<id>/frame, results come back over SSE
+# (their gate decisions count towards /gate/stats with the X-Session-Id gates)
+stream_sessions = SessionRegistry(stream_process, gate_stats=session_gates.stats)
+
+# Read from their owners at scrape time
+metrics.collected('vision_ocr_queue_depth', 'OCR crops waiting for a worker', ocr_engine.queue_depth)
+metrics.collected('vision_detect_queue_depth', 'Frames waiting for the detection batcher', detector.queue_depth)
+metrics.collected('vision_stream_sessions', 'Open streaming sessions', stream_sessions.count)
+metrics.collected('vision_cache_lookups_total', 'Result cache lookups by outcome',
+                  lambda: {k: v for k, v in result_cache.stats().items() if k in ('hits', 'near_hits', 'misses')},
+                  'counter', ['result'])
+metrics.collected('vision_cache_hit_ratio', 'Share of cache lookups answered from the cache',
+                  lambda: result_cache.stats()['hit_rate'])
+metrics.collected('vision_cache_entries', 'Entries in the result cache', lambda: result_cache.stats()['entries'])
+metrics.collected('vision_gate_frames_total', 'Session frames by gate decision',
+                  lambda: {k: v for k, v in session_gates.stats.as_dict().items() if k in (BLURRY, CHANGED, UNCHANGED)},
+                  'counter', ['state'])
+
+@app.route('/stream', methods=['POST'])
+def stream_open():
+    """Open a streaming session (?mode=ocr|detect|both)"""
+    mode = request.args.get('mode') or (request.get_json(silent=True) or {}).get('mode', 'ocr')
+    try:
+        session = stream_sessions.create(mode)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except SessionLimitError as e:
+        response = jsonify({'error': str(e), 'success': False})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({
+        'session_id': session.id,
+        'mode': session.mode,
+        'max_side': MAX_SIDE,
+        'frames': f'/stream/{session.id}/frame',
+        'events': f'/stream/{session.id}/events',
+        'success': True
+    }), 201
+
+@app.route('/stream/<session_id>/frame', methods=['POST'])
+def stream_frame(session_id):
+    """Queue a frame for a session, replacing any frame not yet processed"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or closed session', 'success': False}), 404
+    try:
+        payload, shape = read_upload()
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    # Copy out of the reused body buffer: the session keeps the frame after we return
+    dropped = session.push(bytes(payload), shape)
+    return jsonify({'accepted': True, 'dropped': dropped, 'success': True}), 202
+
+@app.route('/stream/<session_id>/events', methods=['GET'])
+def stream_events(session_id):
+    """Server-Sent Events with incremental OCR/detection results for a session"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or closed session', 'success': False}), 404
+    return Response(session.sse(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/stream/<session_id>', methods=['DELETE'])
+def stream_close(session_id):
+    if not stream_sessions.close(session_id):
+        return jsonify({'error': 'Unknown or closed session', 'success': False}), 404
+    return jsonify({'success': True})
+
+@app.route('/stream/stats', methods=['GET'])
+def stream_stats():
+    return jsonify(stream_sessions.stats())
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'OCR API is running'})
 
+@app.route('/ready', methods=['GET'])
+def ready_check():
+    """Readiness: 200 once OCR is loaded and YOLO has loaded (or is known to be unavailable)"""
+    status = readiness.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=None, content_type=Registry.CONTENT_TYPE)
+
+@app.route('/profile/start', methods=['POST'])
+def profile_start():
+    """Start the sampling profiler (?interval_ms=10&seconds=30&idle=1); needs API_PROFILING=1"""
+    if not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled (set API_PROFILING=1)', 'success': False}), 403
+    try:
+        interval_ms = float(request.args.get('interval_ms', 10))
+        seconds = float(request.args.get('seconds', 30))
+    except ValueError:
+        return jsonify({'error': 'interval_ms and seconds must be numbers', 'success': False}), 400
+    if not profiler.start(interval_ms, seconds, include_idle=request.args.get('idle') == '1'):
+        return jsonify({'error': 'Profiler is already running', 'success': False}), 409
+    return jsonify({'success': True, 'interval_ms': interval_ms, 'seconds': seconds})
+
+@app.route('/profile/stop', methods=['POST'])
+def profile_stop():
+    if not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled (set API_PROFILING=1)', 'success': False}), 403
+    return jsonify(profiler.stop())
+
+@app.route('/profile', methods=['GET'])
+def profile_report():
+    """Top functions as JSON, or collapsed stacks for flame graphs with ?format=collapsed"""
+    if not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled (set API_PROFILING=1)', 'success': False}), 403
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype='text/plain')
+    return jsonify(profiler.report())
+
+@app.route('/config', methods=['GET'])
+def client_config():
+    """Upload hints for clients: downscale to max_side and prefer raw bodies over multipart"""
+    return jsonify({
+        'max_side': MAX_SIDE,
+        'max_upload_bytes': MAX_UPLOAD_BYTES,
+        'max_batch_items': MAX_BATCH_ITEMS,
+        'max_batch_bytes': MAX_BATCH_BYTES,
+        'content_types': ['image/jpeg', 'image/webp', 'image/png', GRAY8_TYPE, 'multipart/form-data'],
+    })
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/gate/stats', methods=['GET'])
+def gate_stats():
+    return jsonify(session_gates.stats.as_dict())
+
+def serve(host, port, threads):
+    """Serve with waitress (works on Windows); fall back to threaded Werkzeug"""
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        print("⚠️  waitress not installed - falling back to the threaded Flask server")
+        app.run(host=host, port=port, threaded=True)
+        return
+    # Keep the connection backlog close to the in-flight limit so overload
+    # turns into fast 503s instead of a long accept queue
+    waitress_serve(app, host=host, port=port, threads=threads,
+                   connection_limit=threads * 2, backlog=MAX_INFLIGHT,
+                   channel_timeout=int(WORK_TIMEOUT) + 10)
+
+def create_app():
+    """WSGI entry point that also starts loading the models: gunicorn 'api_server:create_app()'"""
+    start_loading()
+    return app
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OCR API server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    # More handler threads than in-flight slots, so excess requests reach the
+    # 503 check instead of waiting in waitress' task queue, and /health stays responsive
+    parser.add_argument('--threads', type=int, default=MAX_INFLIGHT + 16,
+                        help='Request handler threads (production mode)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Use the Flask debug server with the reloader')
+    args = parser.parse_args()
+
     print("🚀 Starting OCR API server...")
-    print("📝 API will be available at: http://localhost:5000")
-    print("🔍 OCR endpoint: POST http://localhost:5000/ocr")
-    print("💚 Health check: GET http://localhost:5000/health")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    print(f"📝 API will be available at: http://localhost:{args.port}")
+    print(f"🔍 OCR endpoint: POST http://localhost:{args.port}/ocr")
+    print(f"🎯 Detection endpoint: POST http://localhost:{args.port}/detect")
+    print(f"📡 Streaming sessions: POST http://localhost:{args.port}/stream")
+    print(f"💚 Health check: GET http://localhost:{args.port}/health (readiness: GET /ready)")
+    print(f"📐 Max image side: {MAX_SIDE}px (GET /config)")
+    print(f"📊 Metrics: GET http://localhost:{args.port}/metrics"
+          + (" (profiler: POST /profile/start)" if PROFILING_ENABLED else ""))
+
+    # Load and warm up OCR and YOLO while the server starts accepting requests
+    # (under --debug, only in the reloader's child that actually serves)
+    if not args.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_loading()
+    print(f"⏱️  Accepting requests after {readiness.mark('listening'):.2f}s; models loading in the background")
+    if args.debug:
+        app.run(host=args.host, port=args.port, debug=True)
+    else:
+        print(f"⚙️  Production mode: {args.threads} threads, {MAX_INFLIGHT} in-flight, {WORK_THREADS} work threads")
+        serve(args.host, args.port, args.threads)
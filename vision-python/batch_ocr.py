@@ -0,0 +1,294 @@
+"""Batch OCR over image directories, multi-page PDF/TIFF files and recorded videos.
+
+Items are produced lazily and fed to a pool of worker processes through a
+bounded window, so memory stays flat however many pages there are. Results are
+appended to a JSONL file as each item finishes; re-running with the same
+output file skips items already written. Failed items are skipped too unless
+--retry-failed is given, which drops their error records and tries them
+again, so every id appears in the file once.
+
+Usage:
+    python batch_ocr.py scans/ letters.pdf fax.tiff pages.mp4 --output results.jsonl
+    python batch_ocr.py scans/ --output results.jsonl --workers 4   # resumes if results.jsonl exists
+    python batch_ocr.py scans/ --output results.jsonl --retry-failed
+
+Each line holds the item id (path, path#page=N or path#frame=N), text, lines,
+mean confidence and timing, or an error. Video frames are sampled every
+--every seconds, and frames that are blurred or match the previous page are
+skipped. PDF pages need PyMuPDF (pip install pymupdf).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from frame_gate import CHANGED, FrameGate
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # Optional: only needed for PDF input
+    fitz = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+# Per worker process: one OCR thread, created by _init_worker
+_worker_pool = None
+_worker_psm = 6
+_worker_words = False
+_pdf_documents = {}
+
+
+# ---- Item sources (run in the parent process) ----
+
+def iter_tasks(paths, every=1.0, dpi=300, gate=True):
+    """Yield (item_id, kind, ref) for every page/frame under `paths`, in a stable order.
+
+    `ref` is what a worker needs to load the item: a path, (path, page) or,
+    for video, the greyscale frame itself (videos must be decoded in order).
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield from iter_tasks([os.path.join(root, name)], every, dpi, gate)
+            continue
+        extension = os.path.splitext(path)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            yield path, 'image', path
+        elif extension in TIFF_EXTENSIONS:
+            yield from _tiff_tasks(path)
+        elif extension == '.pdf':
+            yield from _pdf_tasks(path, dpi)
+        elif extension in VIDEO_EXTENSIONS:
+            yield from _video_tasks(path, every, gate)
+        elif not os.path.exists(path):
+            print(f"⚠️  Skipping {path}: not found")
+
+
+def _tiff_tasks(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        pages = getattr(image, 'n_frames', 1)
+    for page in range(pages):
+        yield f"{path}#page={page + 1}", 'tiff', (path, page)
+
+
+def _pdf_tasks(path, dpi):
+    if fitz is None:
+        print(f"⚠️  Skipping {path}: PDF input needs PyMuPDF (pip install pymupdf)")
+        return
+    with fitz.open(path) as document:
+        pages = document.page_count
+    for page in range(pages):
+        yield f"{path}#page={page + 1}", 'pdf', (path, page, dpi)
+
+
+def _video_tasks(path, every, gate):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"⚠️  Skipping {path}: cannot open video")
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(every * fps))
+    frame_gate = FrameGate() if gate else None
+    index = 0
+    try:
+        while True:
+            # grab() skips decoding the frames between samples
+            if not cap.grab():
+                break
+            if index % step == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if frame_gate is None or frame_gate.check(gray) == CHANGED:
+                    yield f"{path}#frame={index}", 'frame', gray
+            index += 1
+    finally:
+        cap.release()
+
+
+# ---- Worker process ----
+
+def _init_worker(psm, words):
+    global _worker_pool, _worker_psm, _worker_words
+    import ocr_engine
+    # Parallelism comes from the processes; one OCR thread each
+    _worker_pool = ocr_engine.OCRWorkerPool(workers=1)
+    _worker_psm, _worker_words = psm, words
+
+
+def _load(kind, ref):
+    if kind == 'image':
+        image = cv2.imread(ref, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError('Could not decode image')
+        return image
+    if kind == 'tiff':
+        from PIL import Image
+        path, page = ref
+        with Image.open(path) as image:
+            image.seek(page)
+            return np.asarray(image.convert('L'))
+    if kind == 'pdf':
+        path, page, dpi = ref
+        document = _pdf_documents.get(path)
+        if document is None:
+            document = _pdf_documents[path] = fitz.open(path)
+        pixmap = document[page].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        return np.frombuffer(pixmap.samples, np.uint8).reshape(pixmap.height, pixmap.width)
+    return ref  # 'frame': already a greyscale array
+
+
+def _ocr_item(item_id, kind, ref):
+    import ocr_engine
+    start = time.perf_counter()
+    image = _load(kind, ref)
+    result = ocr_engine.recognize_text(image, psm=_worker_psm, pool=_worker_pool)
+    record = {'id': item_id, 'text': result['text'], 'lines': result['lines'],
+              'confidence': round(result['confidence'], 2), 'width': image.shape[1], 'height': image.shape[0],
+              'seconds': round(time.perf_counter() - start, 3)}
+    if _worker_words:
+        record['words'] = result['words']
+    return record
+
+
+# ---- Driver ----
+
+def _records(output):
+    """Parsed records of an output file (a torn last line is ignored)"""
+    if not os.path.exists(output):
+        return
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def completed_ids(output, include_failed=True):
+    """Ids of items already written (only the successful ones with include_failed=False)"""
+    return {record['id'] for record in _records(output) if include_failed or 'error' not in record}
+
+
+def _drop_failed(output):
+    """Rewrite the output without its error records, before those items are retried"""
+    records = list(_records(output))
+    temp = output + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        for record in records:
+            if 'error' not in record:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(temp, output)
+    return sum(1 for record in records if 'error' in record)
+
+
+def _terminate_last_line(output):
+    """After a crash mid-write, start appending on a fresh line"""
+    if os.path.exists(output) and os.path.getsize(output):
+        with open(output, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+
+def run_batch(paths, output, workers=None, every=1.0, dpi=300, psm=6, gate=True, words=False, max_pending=None,
+              retry_failed=False):
+    """OCR every item under `paths` into `output` (JSONL), skipping items already done (or failed)"""
+    workers = workers or os.cpu_count() or 2
+    max_pending = max_pending or workers * 2
+    if retry_failed and os.path.exists(output):
+        dropped = _drop_failed(output)
+        if dropped:
+            print(f"🔁 Retrying {dropped} failed items")
+    done = completed_ids(output)
+    if done:
+        print(f"⏩ Resuming: {len(done)} items already in {output}")
+    _terminate_last_line(output)
+
+    counts = {'done': 0, 'failed': 0, 'skipped': 0}
+    start = time.perf_counter()
+    last_report = start
+
+    def write(future, out):
+        nonlocal last_report
+        item_id = pending.pop(future)
+        try:
+            record = future.result()
+            counts['done'] += 1
+        except Exception as e:
+            record = {'id': item_id, 'error': str(e)}
+            counts['failed'] += 1
+            print(f"❌ {item_id}: {e}")
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+        if time.perf_counter() - last_report >= 10:
+            last_report = time.perf_counter()
+            rate = counts['done'] / (last_report - start)
+            print(f"📄 {counts['done']} done, {counts['failed']} failed ({rate:.2f} items/s)")
+
+    print(f"🚀 Batch OCR with {workers} worker processes -> {output}")
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(psm, words)) as executor, \
+            open(output, 'a', encoding='utf-8') as out:
+        try:
+            for item_id, kind, ref in iter_tasks(paths, every, dpi, gate):
+                if item_id in done:
+                    counts['skipped'] += 1
+                    continue
+                # Bounded window: never hold more than max_pending items in memory
+                while len(pending) >= max_pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        write(future, out)
+                pending[executor.submit(_ocr_item, item_id, kind, ref)] = item_id
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future, out)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            print("\n⏸️  Interrupted; re-run with the same --output to resume")
+            raise
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {counts['done']} items in {elapsed:.1f}s ({counts['done'] / elapsed if elapsed else 0:.2f} items/s), "
+          f"{counts['failed']} failed, {counts['skipped']} already done")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch OCR over image directories, PDF/TIFF files and videos')
+    parser.add_argument('inputs', nargs='+', help='Image files or directories, .pdf, .tif/.tiff or video files')
+    parser.add_argument('--output', '-o', required=True, help='JSONL file for results (appended to; enables resume)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--every', type=float, default=1.0, help='Seconds between sampled video frames')
+    parser.add_argument('--dpi', type=int, default=300, help='PDF rendering resolution')
+    parser.add_argument('--psm', type=int, default=6, help='Tesseract page segmentation mode')
+    parser.add_argument('--no-gate', action='store_true', help='Keep blurred and repeated video frames')
+    parser.add_argument('--words', action='store_true', help='Include word boxes in the output')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Retry items that failed in an earlier run (their error records are replaced)')
+    args = parser.parse_args()
+
+    try:
+        counts = run_batch(args.inputs, args.output, args.workers, args.every, args.dpi, args.psm,
+                           gate=not args.no_gate, words=args.words, retry_failed=args.retry_failed)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Compare the old two-pass /ocr recognition against the single-pass ocr_engine.run_ocr.
+
+Usage:
+    python benchmarks/bench_ocr_single_pass.py [image_dir] [--rounds N]
+
+Without an image directory a fixed set of synthetic text images is generated so
+runs are comparable across machines and commits.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_engine  # noqa: E402
+
+SAMPLE_LINES = [
+    "Organic Whole Milk 1L",
+    "Best before 15/12/2024",
+    "Ingredients: milk, vitamin D",
+    "Keep refrigerated below 5C",
+    "Nutrition facts per 100ml",
+]
+
+
+def synthetic_samples(count=8):
+    """Render a deterministic set of label-like images"""
+    images = []
+    for i in range(count):
+        image = np.full((720, 1280, 3), 255, dtype=np.uint8)
+        for j, line in enumerate(SAMPLE_LINES[:2 + i % 4]):
+            cv2.putText(image, line, (60, 120 + j * 90), cv2.FONT_HERSHEY_SIMPLEX,
+                        1.4 + 0.1 * (i % 3), (0, 0, 0), 3)
+        images.append(image)
+    return images
+
+
+def load_samples(image_dir):
+    paths = sorted(glob.glob(os.path.join(image_dir, '*')))
+    images = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+    return [img for img in images if img is not None]
+
+
+def preprocess(image):
+    """Same preprocessing as the /ocr endpoint"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.medianBlur(thresh, 3)
+
+
+def two_pass(image):
+    """The previous /ocr implementation: image_to_string followed by image_to_data"""
+    text = pytesseract.image_to_string(image, config='--psm 6')
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    confidences = [float(c) for c in data['conf'] if float(c) > 0]
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return lines, (sum(confidences) / len(confidences) if confidences else 0)
+
+
+def single_pass(image):
+    return ocr_engine.run_ocr(image, config='--psm 6')
+
+
+def measure(fn, images, rounds):
+    fn(images[0])  # warm the page cache for tesseract and its traineddata
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for image in images:
+            fn(image)
+    elapsed = time.perf_counter() - start
+    return rounds * len(images) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('image_dir', nargs='?', help='Directory of sample images')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_samples(args.image_dir) if args.image_dir else synthetic_samples()
+    if not images:
+        print("❌ No images found")
+        return 1
+    images = [preprocess(img) for img in images]
+
+    print(f"📊 {len(images)} images x {args.rounds} rounds")
+    before = measure(two_pass, images, args.rounds)
+    print(f"  two-pass (before):   {before:.2f} req/s")
+    after = measure(single_pass, images, args.rounds)
+    print(f"  single-pass (after): {after:.2f} req/s")
+    print(f"  speedup: {after / before:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
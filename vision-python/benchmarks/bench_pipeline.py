@@ -0,0 +1,336 @@
+"""End-to-end benchmark of the vision pipeline on recorded frames.
+
+Runs the camera_ocr_tts.py stages and the api_server.py endpoints on a video
+file or an image directory instead of a live camera (a fixed synthetic scene
+set when neither is given) and writes per-stage latency, throughput, peak RSS
+and CPU use as JSON, so runs can be compared across commits.
+
+Stages:
+    decode      reading the next frame from the video / image file
+    preprocess  per-crop OCR preprocessing (preprocessing.prepare_for_ocr)
+    ocr         text-region search + Tesseract (ocr_engine.recognize_text, minus preprocess)
+    yolo        camera_ocr_tts.detect_objects without annotation
+    summary     camera_ocr_tts.get_detection_summary
+    tts         speech synthesis of the summary (no playback, phrase cache bypassed)
+    api_ocr     POST /ocr with the frame as a raw JPEG body
+    api_detect  POST /detect with the frame as a raw JPEG body
+
+The API stages use Flask's in-process test client, or a running server with
+--url. In-process, the result cache is cleared before each request so every
+frame is really processed; with --url, peak RSS and CPU are the client's, not
+the server's.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--video clip.mp4 | --images dir] [--frames 50]
+        [--stages decode,ocr,yolo] [--output results.json]
+    python benchmarks/bench_pipeline.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ('decode', 'preprocess', 'ocr', 'yolo', 'summary', 'tts', 'api_ocr', 'api_detect')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+SETTINGS_ENV = ('DETECT_BACKEND', 'DETECT_MODEL', 'DETECT_IMGSZ', 'DETECT_THREADS', 'OCR_WORKERS',
+                'OCR_TEXT_HEIGHT', 'TTS_BACKEND', 'API_MAX_SIDE')
+SAMPLE_LINES = ["EXIT", "Platform 2 - Trains to Oxford", "Best before 15/12/2024", "Keep refrigerated"]
+
+
+def synthetic_frames(count):
+    """Deterministic 720p scenes: text on a textured background plus a few solid shapes"""
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        frame = rng.integers(90, 140, (720, 1280, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (80, 80), (700, 360), (245, 245, 245), -1)
+        for j, line in enumerate(SAMPLE_LINES[:1 + i % len(SAMPLE_LINES)]):
+            cv2.putText(frame, line, (100, 140 + j * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 3)
+        cv2.circle(frame, (950 + 10 * (i % 5), 450), 120, (40, 60, 200), -1)
+        yield frame
+
+
+def read_frames(video=None, images=None, count=50):
+    """Yield (frame, decode_seconds) from the source"""
+    if video:
+        cap = cv2.VideoCapture(video)
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                elapsed = time.perf_counter() - start
+                if not ret:
+                    break
+                yield frame, elapsed
+        finally:
+            cap.release()
+    elif images:
+        paths = sorted(os.path.join(images, f) for f in os.listdir(images)
+                       if f.lower().endswith(IMAGE_EXTENSIONS))[:count]
+        for path in paths:
+            start = time.perf_counter()
+            frame = cv2.imread(path)
+            elapsed = time.perf_counter() - start
+            if frame is not None:
+                yield frame, elapsed
+    else:
+        # Synthetic frames go through a JPEG round trip so decode is measured too
+        for frame in synthetic_frames(count):
+            encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1]
+            start = time.perf_counter()
+            frame = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+            yield frame, time.perf_counter() - start
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (None where it cannot be read)"""
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 1024 / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows without psutil
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if platform.system() == 'Darwin' else 1), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds for one stage"""
+    ms = np.asarray(samples) * 1000
+    return {'count': len(ms), 'mean_ms': round(float(ms.mean()), 3), 'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3), 'max_ms': round(float(ms.max()), 3),
+            'throughput_fps': round(1000 / float(ms.mean()), 2) if ms.mean() > 0 else None}
+
+
+class Pipeline:
+    """Sets up the requested stages and times them on one frame at a time"""
+
+    def __init__(self, stages, url=None, allow_online_tts=False):
+        self.stages = set(stages)
+        self.skipped = {}
+        self.url = url.rstrip('/') if url else None
+        self._preprocess_time = 0.0
+
+        if self.stages & {'preprocess', 'ocr'}:
+            import ocr_engine
+            import preprocessing
+            self.ocr_engine, self.preprocessing = ocr_engine, preprocessing
+            ocr_engine.warm_up()
+        if self.stages & {'yolo', 'summary'}:
+            import camera_ocr_tts
+            self.app = camera_ocr_tts
+            model = camera_ocr_tts.load_detector()
+            if model is None:
+                self._skip({'yolo', 'summary'}, 'YOLO model not available')
+            else:
+                camera_ocr_tts._set_yolo_model(model)
+        if 'tts' in self.stages:
+            self._setup_tts(allow_online_tts)
+        if self.stages & {'api_ocr', 'api_detect'} and self.url is None:
+            import api_server
+            self.api = api_server
+            self.client = api_server.app.test_client()
+            if 'api_detect' in self.stages and api_server.detector.get_batcher() is None:
+                self._skip({'api_detect'}, 'YOLO model not available')
+
+    def _skip(self, stages, reason):
+        for stage in stages & self.stages:
+            self.skipped[stage] = reason
+        self.stages -= stages
+
+    def _setup_tts(self, allow_online):
+        import tts_engine
+        try:
+            self.tts = tts_engine.create_backend()
+        except Exception as e:
+            self._skip({'tts'}, str(e))
+            return
+        if self.tts.name == 'gtts' and not allow_online:
+            self._skip({'tts'}, 'only the online gTTS backend is available (pass --online-tts to include it)')
+
+    def _timed_prepare(self, crop):
+        start = time.perf_counter()
+        try:
+            return self.preprocessing.prepare_for_ocr(crop)
+        finally:
+            self._preprocess_time += time.perf_counter() - start
+
+    def _post(self, path, body):
+        if self.url is not None:
+            req = urllib.request.Request(self.url + path, data=body, headers={'Content-Type': 'image/jpeg'})
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+            return
+        self.api.result_cache.clear()
+        response = self.client.post(path, data=body, content_type='image/jpeg')
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.get_json()}")
+
+    def run(self, frame):
+        """Returns {stage: seconds} for this frame"""
+        timings = {}
+        if self.stages & {'preprocess', 'ocr'}:
+            self._preprocess_time = 0.0
+            start = time.perf_counter()
+            self.ocr_engine.recognize_text(frame, preprocess=self._timed_prepare)
+            total = time.perf_counter() - start
+            timings['preprocess'] = self._preprocess_time
+            timings['ocr'] = total - self._preprocess_time
+        summary = None
+        if 'yolo' in self.stages:
+            start = time.perf_counter()
+            self.app.detect_objects(frame, annotate=False)
+            timings['yolo'] = time.perf_counter() - start
+            start = time.perf_counter()
+            summary = self.app.get_detection_summary()
+            timings['summary'] = time.perf_counter() - start
+        if 'tts' in self.stages:
+            start = time.perf_counter()
+            self.tts.synthesize(summary or "No objects detected")
+            timings['tts'] = time.perf_counter() - start
+        if self.stages & {'api_ocr', 'api_detect'}:
+            body = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+            for stage, path in (('api_ocr', '/ocr'), ('api_detect', '/detect')):
+                if stage in self.stages:
+                    start = time.perf_counter()
+                    self._post(path, body)
+                    timings[stage] = time.perf_counter() - start
+        return {stage: seconds for stage, seconds in timings.items() if stage in self.stages}
+
+
+def benchmark(args):
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"❌ Unknown stages: {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+
+    print("⚙️  Setting up stages...")
+    pipeline = Pipeline(stages, url=args.url, allow_online_tts=args.online_tts)
+    for stage, reason in pipeline.skipped.items():
+        print(f"⚠️  Skipping {stage}: {reason}")
+
+    samples = {stage: [] for stage in stages}
+    frames = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for i, (frame, decode_seconds) in enumerate(read_frames(args.video, args.images, args.frames + args.warmup)):
+        timings = pipeline.run(frame)
+        if i < args.warmup:
+            continue
+        if 'decode' in samples:
+            samples['decode'].append(decode_seconds)
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+        frames += 1
+        if i == args.warmup:
+            # Start resource accounting after warm-up (model loading is not per-frame cost)
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if frames == 0:
+        raise SystemExit("❌ No frames to benchmark")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'source': args.video or args.images or 'synthetic',
+            'frames': frames,
+            'warmup': args.warmup,
+            'api': args.url or ('in-process' if {'api_ocr', 'api_detect'} & set(stages) else None),
+            'settings': {name: os.environ[name] for name in SETTINGS_ENV if name in os.environ},
+        },
+        'stages': {stage: summarize(values) for stage, values in samples.items() if values},
+        'skipped': pipeline.skipped,
+        # Frames after the first, through every enabled stage back to back
+        'pipeline_fps': round((frames - 1) / wall, 2) if frames > 1 and wall > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'cpu': {'process_s': round(cpu, 3), 'wall_s': round(wall, 3),
+                'utilization': round(cpu / wall, 2) if wall > 0 else None},
+    }
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"\n📊 {meta['frames']} frames from {meta['source']} (commit {meta['commit'] or 'unknown'})")
+    print(f"{'stage':<12} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9} {'fps':>8}  (ms)")
+    for stage, s in report['stages'].items():
+        fps = f"{s['throughput_fps']:.1f}" if s['throughput_fps'] else '-'
+        print(f"{stage:<12} {s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['max_ms']:>9.2f} {fps:>8}")
+    print(f"Pipeline: {report['pipeline_fps']} fps, peak RSS {report['peak_rss_mb']} MB, "
+          f"CPU {report['cpu']['utilization']} cores")
+
+
+def compare(before_path, after_path):
+    """Print the per-stage change between two result files"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"📊 {before['meta']['commit'] or before_path} -> {after['meta']['commit'] or after_path}")
+    print(f"{'stage':<12} {'mean before':>12} {'mean after':>11} {'change':>8} {'p95 before':>11} {'p95 after':>10}")
+    for stage in [s for s in STAGES if s in before['stages'] or s in after['stages']]:
+        b, a = before['stages'].get(stage), after['stages'].get(stage)
+        if b is None or a is None:
+            print(f"{stage:<12} {'only in ' + ('after' if b is None else 'before'):>12}")
+            continue
+        change = (a['mean_ms'] - b['mean_ms']) / b['mean_ms'] * 100 if b['mean_ms'] else 0.0
+        print(f"{stage:<12} {b['mean_ms']:>12.2f} {a['mean_ms']:>11.2f} {change:>+7.1f}% "
+              f"{b['p95_ms']:>11.2f} {a['p95_ms']:>10.2f}")
+    for key in ('pipeline_fps', 'peak_rss_mb'):
+        print(f"{key:<12} {before.get(key)!s:>12} {after.get(key)!s:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--video', help='Recorded video file')
+    source.add_argument('--images', help='Directory of images')
+    parser.add_argument('--frames', type=int, default=50, help='Frames to measure (after warm-up)')
+    parser.add_argument('--warmup', type=int, default=2, help='Frames run first and not measured')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--url', help='Benchmark a running API server (e.g. http://localhost:5000)')
+    parser.add_argument('--online-tts', action='store_true', help='Allow the online gTTS backend in the tts stage')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    report = benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
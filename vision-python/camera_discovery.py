@@ -0,0 +1,150 @@
+import json
+import os
+import platform
+import threading
+import time
+
+import cv2
+
+# Camera discovery settings (override with environment variables)
+CAMERA_MAX_INDEX = int(os.environ.get('CAMERA_MAX_INDEX', 10))          # probe indices 0..N-1
+CAMERA_PROBE_TIMEOUT = float(os.environ.get('CAMERA_PROBE_TIMEOUT', 5))  # seconds for a whole scan
+CAMERA_PROFILE_PATH = os.environ.get('CAMERA_PROFILE_PATH',
+                                     os.path.join(os.path.expanduser('~'), '.vision_cameras.json'))
+PROBE_READS = 3  # a camera may return a few empty frames right after opening
+
+WINDOWS_BACKENDS = [
+    getattr(cv2, 'CAP_DSHOW', 700),   # DirectShow (Windows)
+    getattr(cv2, 'CAP_MSMF', 1400),   # Media Foundation (Windows)
+    getattr(cv2, 'CAP_ANY', 0),       # Fallback
+]
+
+KNOWN_VIRTUAL_DEVICE_NAMES = [
+    'EOS Webcam Utility',
+    'EOS Webcam Utility Pro',
+]
+
+_cache_lock = threading.Lock()
+
+
+def camera_source(index):
+    """VideoCapture source for a camera index or a 'name:<device>' pseudo index (Windows dshow names)"""
+    if isinstance(index, str) and index.startswith('name:'):
+        return f"video={index.split(':', 1)[1]}"
+    return index
+
+
+def open_capture(index, backends=WINDOWS_BACKENDS):
+    """Open a camera with the first backend that delivers a frame; returns (cap, backend, frame)"""
+    source = camera_source(index)
+    for backend in backends:
+        try:
+            cap = cv2.VideoCapture(source, backend)
+            if cap.isOpened():
+                for _ in range(PROBE_READS):
+                    ret, frame = cap.read()
+                    if ret and frame is not None and frame.size > 0:
+                        return cap, backend, frame
+                    time.sleep(0.05)
+            cap.release()
+        except Exception:
+            pass
+    return None, None, None
+
+
+def make_profile(cap, index, backend, frame):
+    """What we remember about a working camera"""
+    return {'index': index, 'backend': backend, 'width': int(frame.shape[1]),
+            'height': int(frame.shape[0]), 'fps': float(cap.get(cv2.CAP_PROP_FPS) or 0.0)}
+
+
+def probe(index, backends=WINDOWS_BACKENDS):
+    """Profile of a working camera, or None"""
+    cap, backend, frame = open_capture(index, backends)
+    if cap is None:
+        return None
+    profile = make_profile(cap, index, backend, frame)
+    cap.release()
+    return profile
+
+
+def probe_all(sources, timeout=CAMERA_PROBE_TIMEOUT):
+    """Probe (index, backends) pairs concurrently; returns working profiles in source order.
+
+    Each source gets its own thread (backends for one device are still tried
+    in turn). Probes still running at the deadline are abandoned and count
+    as unavailable; their threads release the device when they finish.
+    """
+    results = {}
+
+    def run(i, index, backends):
+        results[i] = probe(index, backends)
+
+    threads = [threading.Thread(target=run, args=(i, index, backends), name=f'camera-probe-{index}', daemon=True)
+               for i, (index, backends) in enumerate(sources)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return [results[i] for i in range(len(sources)) if results.get(i)]
+
+
+def load_profiles(path=CAMERA_PROFILE_PATH):
+    """Cached {'cameras': [profiles], 'last': profile} (empty if missing or unreadable)"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profiles(path=CAMERA_PROFILE_PATH, **updates):
+    """Merge `cameras=` and/or `last=` into the profile cache (best-effort)"""
+    with _cache_lock:
+        data = load_profiles(path)
+        data.update(updates)
+        data['saved_at'] = time.time()
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save camera profiles to {path}: {e}")
+
+
+def discover_cameras(refresh=False):
+    """Working camera profiles.
+
+    Cameras from the profile cache are revalidated with their known backend
+    (one open per device, in parallel). A full concurrent scan of indices
+    and known virtual devices runs on refresh, when nothing is cached, or
+    when none of the cached cameras respond.
+    """
+    start = time.perf_counter()
+    cached = [] if refresh else load_profiles().get('cameras') or []
+    cameras = probe_all([(p['index'], [p['backend']]) for p in cached]) if cached else []
+    if not cameras:
+        sources = [(i, WINDOWS_BACKENDS) for i in range(CAMERA_MAX_INDEX)]
+        if platform.system() == 'Windows':
+            sources += [(f"name:{name}", WINDOWS_BACKENDS) for name in KNOWN_VIRTUAL_DEVICE_NAMES]
+        cameras = probe_all(sources)
+        save_profiles(cameras=cameras)
+        print(f"🔍 Scanned {len(sources)} camera sources in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"🔍 Revalidated {len(cached)} cached camera(s) in {time.perf_counter() - start:.2f}s")
+    return cameras
+
+
+def last_camera():
+    """Profile of the camera that was opened last time (None if unknown)"""
+    return load_profiles().get('last')
+
+
+def remember(profile):
+    """Record a camera that opened successfully so the next start reconnects to it first"""
+    cameras = load_profiles().get('cameras') or []
+    cameras = [profile if p['index'] == profile['index'] else p for p in cameras]
+    if profile not in cameras:
+        cameras.append(profile)
+    save_profiles(cameras=cameras, last=profile)
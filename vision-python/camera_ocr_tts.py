@@ -1,241 +1,245 @@
+from startup import LOADING, Readiness
 import cv2
-import pytesseract
-from gtts import gTTS
+import camera_discovery
+import ocr_engine
+import scene_summary
+import tts_engine
 import os
 import time
-import subprocess
 import platform
 import numpy as np
-from ultralytics import YOLO
+from detector import load_yolo_model, result_to_detections, warm_up, DETECT_CONF, DETECT_IMGSZ
+from governor import QualityGovernor
+from frame_ring import SharedFrameRing
 import threading
-from typing import Optional, Tuple
-
-# Set the Tesseract path for Windows
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-# Load YOLO model
-def load_yolo_model():
-    """Load YOLO v11 model"""
-    try:
-        model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app', 'model', 'yolo11n.pt')
-        if os.path.exists(model_path):
-            print(f"🤖 Loading YOLO model from: {model_path}")
-            model = YOLO(model_path)
-            print("✅ YOLO model loaded successfully!")
-            return model
-        else:
-            print(f"❌ YOLO model not found at: {model_path}")
-            print("Please ensure the model file exists in the correct location.")
-            return None
-    except Exception as e:
-        print(f"❌ Error loading YOLO model: {e}")
-        return None
+from live_pipeline import ContinuousDetector, FrameGrabber, InferenceWorker, PipelineStats
+from tracker import IoUTracker, describe_events
+from frame_gate import BLURRY, UNCHANGED, FrameGate, GateStats
 
 # Global variables for object detection
 yolo_model = None
 detection_results = []
+detection_frame_shape = None  # (height, width) of the frame detection_results came from
 detection_lock = threading.Lock()
+model_lock = threading.Lock()  # YOLO is shared by key presses and continuous mode
 
-def speak_text(text):
-    """Improved text-to-speech function with better Windows compatibility"""
-    try:
-        # Clean the text for better TTS
-        clean_text = text.strip()
-        if not clean_text:
-            return
-            
-        print(f"🔊 Converting to speech: '{clean_text}'")
-        
-        # Generate speech file
-        tts = gTTS(text=clean_text, lang='en', slow=False)
-        audio_file = 'output.mp3'
-        tts.save(audio_file)
+# YOLO and OCR load in the background while the camera opens
+readiness = Readiness()
+
+# Continuous detection mode settings
+CONTINUOUS_STRIDE = int(os.environ.get('CONTINUOUS_STRIDE', 2))
+CONTINUOUS_DUTY = float(os.environ.get('CONTINUOUS_DUTY', 0.5))
+
+# Frame gating: skip OCR/YOLO on unchanged or blurred frames
+gate_stats = GateStats()
+job_gates = {}  # job kind -> FrameGate (last_result holds (speech_text, display))
+BLURRY_MESSAGE = "Image is blurry. Hold the camera still."
+
+# Capture size set when a camera is opened; the governor may lower it
+CAPTURE_SIZE = (1280, 720)
+
+# OCR_PROCESSES > 0: frames are captured into shared memory and OCR runs in
+# that many worker processes reading them in place (no pickled frames)
+OCR_PROCESSES = int(os.environ.get('OCR_PROCESSES', 0))
+RING_MAX_SHAPE = (1080, 1920, 3)  # largest camera frame the ring holds
+frame_ring = None
+process_ocr = None
+
+# Runtime quality governor for the continuous-detection loop: steps settings
+# down when frame-to-result latency exceeds GOVERNOR_BUDGET_MS and back up when
+# there is headroom. Knobs for the slowest stage go first; values run from best
+# quality to cheapest
+governor = QualityGovernor()
+governor.add_knob('stride', [CONTINUOUS_STRIDE * n for n in (1, 2, 3)], stages=('detect',))
+governor.add_knob('imgsz', [DETECT_IMGSZ] + [s for s in (512, 416, 320) if s < DETECT_IMGSZ], stages=('detect',))
+governor.add_knob('capture', [CAPTURE_SIZE, (960, 540), (640, 360)], stages=('detect',))
+
+# On-demand OCR (key presses) has its own budget, so a slow page does not
+# degrade the live loop and vice versa. Each sample is one page, from capture
+# to the end of OCR (speech is queued afterwards and not counted); the median
+# of at least 3 pages is compared with the budget, so one long document does
+# not lower ocr_regions for the pages after it
+OCR_BUDGET_MS = float(os.environ.get('GOVERNOR_OCR_BUDGET_MS', 3000))
+ocr_governor = QualityGovernor(budget_ms=OCR_BUDGET_MS, min_samples=3, quantile=0.5, name='OCR governor')
+ocr_governor.add_knob('ocr_regions', [None, 12, 6, 3], stages=('ocr',))
+
+def draw_detections(frame, detected_objects):
+    """Draw bounding boxes and labels onto a copy of the frame"""
+    annotated_frame = frame.copy()
+    for obj in detected_objects:
+        x1, y1, x2, y2 = obj['bbox']
+        conf = obj['confidence']
         
-        # Play audio using system command (more reliable than playsound)
-        if platform.system() == "Windows":
-            try:
-                # Try using Windows Media Player
-                subprocess.run(['start', 'output.mp3'], shell=True, check=True)
-                time.sleep(2)  # Wait for audio to play
-            except:
-                try:
-                    # Fallback to PowerShell
-                    subprocess.run(['powershell', '-c', f'(New-Object Media.SoundPlayer "{audio_file}").PlaySync()'], check=True)
-                except:
-                    # Final fallback - just print the text
-                    print(f"📢 Text: {clean_text}")
-        else:
-            # For non-Windows systems
-            subprocess.run(['mpg123', audio_file], check=True)
+        # Draw bounding box
+        color = (0, 255, 0) if conf > 0.7 else (0, 255, 255)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
         
-        # Clean up the audio file
-        try:
-            os.remove(audio_file)
-        except:
-            pass
-            
-    except Exception as e:
-        print(f"❌ Error in text-to-speech: {e}")
-        print(f"📢 Text: {text}")
+        # Add label
+        label = f"{obj['class']} {conf:.2f}"
+        cv2.putText(annotated_frame, label, (x1, y1-10), 
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return annotated_frame
 
-def detect_objects(frame):
-    """Detect objects in frame using YOLO"""
-    global yolo_model, detection_results
+def load_detector():
+    """Load and warm up YOLO (runs on a background thread at startup)"""
+    model = load_yolo_model()
+    if model is not None:
+        warm_up(model)
+    return model
+
+def _set_yolo_model(model):
+    global yolo_model
+    yolo_model = model
+
+def detector_available():
+    """True once YOLO is loaded; otherwise says why it cannot be used yet"""
+    if yolo_model is not None:
+        return True
+    if readiness.state('detector') == LOADING:
+        print("⏳ Object detection is still loading...")
+    else:
+        print("❌ YOLO model not loaded!")
+    return False
+
+def detect_objects(frame, annotate=True):
+    """Detect objects in frame using YOLO (returns the frame untouched when annotate is False)"""
+    global yolo_model, detection_results, detection_frame_shape
     
     if yolo_model is None:
         return frame
     
     try:
-        # Run YOLO detection
-        results = yolo_model(frame, conf=0.5, verbose=False)
+        # Run YOLO detection (at the input size the governor currently allows)
+        start = time.perf_counter()
+        with model_lock:
+            results = yolo_model(frame, conf=DETECT_CONF, imgsz=governor.value('imgsz'), verbose=False)
+        governor.observe('detect', time.perf_counter() - start)
         
         # Process results
         detected_objects = []
-        annotated_frame = frame.copy()
-        
         for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Get box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                    
-                    # Get confidence and class
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    class_name = yolo_model.names[cls]
-                    
-                    detected_objects.append({
-                        'class': class_name,
-                        'confidence': conf,
-                        'bbox': (x1, y1, x2, y2)
-                    })
-                    
-                    # Draw bounding box
-                    color = (0, 255, 0) if conf > 0.7 else (0, 255, 255)
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Add label
-                    label = f"{class_name} {conf:.2f}"
-                    cv2.putText(annotated_frame, label, (x1, y1-10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            detected_objects.extend(result_to_detections(result, yolo_model.names))
         
         # Update global results
         with detection_lock:
             detection_results = detected_objects
+            detection_frame_shape = frame.shape[:2]
         
-        return annotated_frame
+        # Only pay for the copy and drawing when the frame is going to be shown
+        if annotate:
+            return draw_detections(frame, detected_objects)
+        return frame
         
     except Exception as e:
         print(f"❌ Error in object detection: {e}")
         return frame
 
+def read_text(frame):
+    """OCR a frame, limited to the text regions the OCR governor currently allows"""
+    start = time.perf_counter()
+    max_regions = ocr_governor.value('ocr_regions')
+    if process_ocr is not None:
+        # Frames from the ring are only pinned; the worker process reads them in place
+        text = process_ocr.recognize(frame, max_regions=max_regions, block=True)['text']
+    else:
+        text = ocr_engine.recognize_text(frame, max_regions=max_regions)['text']
+    ocr_governor.observe('ocr', time.perf_counter() - start)
+    return text
+
+def detect_for_tracking(frame):
+    """Detection without annotation for continuous mode (returns the object list)"""
+    detect_objects(frame, annotate=False)
+    with detection_lock:
+        return list(detection_results)
+
 def get_detection_summary():
-    """Get a summary of detected objects for speech"""
-    global detection_results
-    
+    """Get a summary of detected objects for speech, nearest first with where they are"""
     with detection_lock:
         if not detection_results:
-            return "No objects detected"
-        
-        # Count objects by class
-        object_counts = {}
-        for obj in detection_results:
-            class_name = obj['class']
-            object_counts[class_name] = object_counts.get(class_name, 0) + 1
-        
-        # Create summary
-        summary_parts = []
-        for class_name, count in object_counts.items():
-            if count == 1:
-                summary_parts.append(f"1 {class_name}")
-            else:
-                summary_parts.append(f"{count} {class_name}s")
-        
-        return f"Detected: {', '.join(summary_parts)}"
-
-WINDOWS_BACKENDS = [
-    getattr(cv2, 'CAP_DSHOW', 700),   # DirectShow (Windows)
-    getattr(cv2, 'CAP_MSMF', 1400),   # Media Foundation (Windows)
-    getattr(cv2, 'CAP_ANY', 0),       # Fallback
-]
-
-KNOWN_VIRTUAL_DEVICE_NAMES = [
-    'EOS Webcam Utility',
-    'EOS Webcam Utility Pro',
-]
-
-def _open_with_backends(camera_source) -> Optional[cv2.VideoCapture]:
-    """Try opening a camera source (index or dshow name) across multiple backends."""
-    for backend in WINDOWS_BACKENDS:
-        try:
-            cap = cv2.VideoCapture(camera_source, backend)
-            if cap.isOpened():
-                # Quick sanity read
-                ret, frame = cap.read()
-                if ret and frame is not None and frame.size > 0:
-                    return cap
-                cap.release()
-        except Exception:
-            pass
-    return None
-
-def test_camera(camera_index):
-    """Test if a camera can actually capture frames (tries multiple backends)."""
-    cap = _open_with_backends(camera_index)
-    if cap is None:
-        return False, None
-    # Try to read a few frames to ensure it's working
-    for _ in range(3):
-        ret, frame = cap.read()
-        if ret and frame is not None and frame.size > 0:
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            cap.release()
-            return True, {'index': camera_index, 'width': width, 'height': height, 'fps': fps}
-        time.sleep(0.2)
-    cap.release()
-    return False, None
-
-def list_available_cameras():
-    """List all available camera devices with proper testing"""
-    available_cameras = []
-    print("🔍 Scanning for cameras...")
+            return scene_summary.NO_OBJECTS
+        return scene_summary.summarize(detection_results, detection_frame_shape)
+
+# Speech priority per job kind (see tts_engine.PRIORITY_*)
+JOB_PRIORITIES = {
+    'ocr': tts_engine.PRIORITY_TEXT,
+    'objects': tts_engine.PRIORITY_OBJECTS,
+    'both': tts_engine.PRIORITY_OBJECTS,
+}
+
+# Jobs whose latency the OCR governor budgets (object jobs are not governed)
+JOB_GOVERNORS = {
+    'ocr': ocr_governor,
+    'both': ocr_governor,
+}
+
+def process_job(kind, frame):
+    """Run one OCR/detection job for the inference worker.
+
+    Returns (speech_text, display) where display is a (window_name, image)
+    pair for the main thread to show, or None. Blurred frames are rejected and
+    an unchanged scene repeats the previous answer without running inference.
+    """
+    gate = job_gates.setdefault(kind, FrameGate(stats=gate_stats))
+    state = gate.check(frame)
+    if state == BLURRY:
+        print("🌫️  Frame is blurry, skipping")
+        return BLURRY_MESSAGE, None
+    if state == UNCHANGED and gate.last_result is not None:
+        print("♻️  Scene unchanged, repeating last result")
+        return gate.last_result
     
-    # Try more camera indices for better detection
-    for i in range(10):  # Check first 10 camera indices
-        print(f"Testing camera {i}...", end=" ")
-        is_working, camera_info = test_camera(i)
-        if is_working:
-            camera_type = "Internal" if i == 0 else "External"
-            print(f"✓ Working ({camera_type}) - {camera_info['width']}x{camera_info['height']} @ {camera_info['fps']:.1f}fps")
-            available_cameras.append(camera_info)
-        else:
-            print("✗ Not available")
+    gate.last_result = _run_job(kind, frame)
+    return gate.last_result
+
+def _run_job(kind, frame):
+    """OCR and/or detection on one frame, without gating"""
+    if kind == 'ocr':
+        text = read_text(frame)
+        print("📝 Detected text:", text.strip())
+        if not text.strip():
+            print("❌ No text detected.")
+        return text.strip(), None
     
-    # On Windows, also try to open known virtual devices by name (e.g., EOS Webcam Utility)
-    if platform.system() == 'Windows':
-        for name in KNOWN_VIRTUAL_DEVICE_NAMES:
-            print(f"Testing virtual device '{name}'...", end=" ")
-            cap = _open_with_backends(f"video={name}")
-            if cap is not None:
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                cap.release()
-                print(f"✓ Working (Virtual) - {width}x{height} @ {fps:.1f}fps")
-                # Use a pseudo index mapping for named devices
-                available_cameras.append({'index': f"name:{name}", 'width': width, 'height': height, 'fps': fps})
-            else:
-                print("✗ Not available")
+    if kind == 'objects':
+        annotated_frame = detect_objects(frame)
+        summary = get_detection_summary()
+        print(f"🎯 {summary}")
+        return summary, ('Object Detection', annotated_frame)
+    
+    # Both OCR and object detection
+    display = None
+    if yolo_model is not None:
+        annotated_frame = detect_objects(frame)
+        display = ('Combined Detection', annotated_frame)
+        obj_summary = get_detection_summary()
+        print(f"🎯 {obj_summary}")
+    else:
+        obj_summary = "No object detection available"
     
+    text = read_text(frame)
+    print("📝 Detected text:", text.strip())
+    
+    # Combine results
+    combined_result = ""
+    if obj_summary != scene_summary.NO_OBJECTS and obj_summary != "No object detection available":
+        combined_result += obj_summary + ". "
+    if text.strip():
+        combined_result += f"Text found: {text.strip()}"
+    if not combined_result:
+        print("❌ No text or objects detected.")
+    return combined_result, display
+
+def list_available_cameras(refresh=False):
+    """List working cameras (cached profiles are revalidated; refresh forces a full scan)"""
+    available_cameras = camera_discovery.discover_cameras(refresh=refresh)
+    for camera in available_cameras:
+        camera_type = "Virtual" if isinstance(camera['index'], str) else "Internal" if camera['index'] == 0 else "External"
+        print(f"  ✓ Camera {camera['index']} ({camera_type}) - {camera['width']}x{camera['height']} @ {camera['fps']:.1f}fps")
     return available_cameras
 
-def select_camera():
-    """Allow user to select a camera or auto-detect"""
-    available_cameras = list_available_cameras()
+def select_camera(refresh=False):
+    """Allow user to select a camera or auto-detect; returns its profile"""
+    available_cameras = list_available_cameras(refresh)
     
     if not available_cameras:
         print("\n❌ No working cameras found!")
@@ -262,28 +266,27 @@ def select_camera():
         if choice == 'q':
             return None
         elif choice == 'auto':
-            return available_cameras[0]['index']
+            return available_cameras[0]
         elif choice.isdigit():
             camera_num = int(choice)
             if 1 <= camera_num <= len(available_cameras):
-                return available_cameras[camera_num - 1]['index']
+                return available_cameras[camera_num - 1]
             else:
                 print(f"Invalid camera number. Please enter 1-{len(available_cameras)}")
         else:
             print("Invalid input. Please enter a number, 'auto', or 'q'")
 
-def open_camera_safely(camera_index):
-    """Safely open a camera with proper error handling (supports Windows virtual devices)."""
+def open_camera_safely(camera_index, backend=None):
+    """Safely open a camera with proper error handling (supports Windows virtual devices).
+
+    With a known backend (from the profile cache) only that one is tried.
+    A camera that opens is remembered so the next start reconnects to it first.
+    """
     print(f"📹 Opening camera {camera_index}...")
     cv2.destroyAllWindows()
 
-    cap = None
-    # Support selecting by name via our pseudo index format 'name:<device>'
-    if isinstance(camera_index, str) and camera_index.startswith('name:'):
-        device_name = camera_index.split(':', 1)[1]
-        cap = _open_with_backends(f"video={device_name}")
-    else:
-        cap = _open_with_backends(camera_index)
+    backends = [backend] if backend is not None else camera_discovery.WINDOWS_BACKENDS
+    cap, backend, _ = camera_discovery.open_capture(camera_index, backends)
 
     if cap is None or not cap.isOpened():
         print(f"❌ Error: Could not open camera {camera_index}")
@@ -291,8 +294,8 @@ def open_camera_safely(camera_index):
 
     # Set camera properties for better performance (best-effort)
     try:
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_SIZE[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_SIZE[1])
         cap.set(cv2.CAP_PROP_FPS, 30)
     except Exception:
         pass
@@ -304,186 +307,199 @@ def open_camera_safely(camera_index):
         cap.release()
         return None
 
+    camera_discovery.remember(camera_discovery.make_profile(cap, camera_index, backend, frame))
     print(f"✅ Camera {camera_index} opened successfully!")
     return cap
 
+def start_process_ocr():
+    """Create the shared frame ring and the OCR worker processes (started in the background)"""
+    global frame_ring, process_ocr
+    frame_ring = SharedFrameRing(slots=8, max_shape=RING_MAX_SHAPE)
+    process_ocr = ocr_engine.ProcessOCRPool(OCR_PROCESSES, frame_ring)
+    return process_ocr
+
+def stop_process_ocr():
+    if process_ocr is not None:
+        process_ocr.close()
+    if frame_ring is not None:
+        frame_ring.close()
+        frame_ring.unlink()
+
+def submit_frame(worker, grabber, kind, seq, frame, captured_at):
+    """Queue a job; a frame in the shared ring stays pinned until the job is done"""
+    lease = grabber.hold(seq)
+    if lease is None:
+        return worker.submit(kind, frame, captured_at)
+    return worker.submit(kind, lease.array, captured_at, release=lease.release)
+
+def start_continuous(grabber, speech):
+    """Start continuous detection with a fresh tracker"""
+    print(f"▶️  Continuous detection on (every {CONTINUOUS_STRIDE} frames, {CONTINUOUS_DUTY:.0%} duty)")
+    return ContinuousDetector(grabber, detect_for_tracking, IoUTracker(), speech, describe_events,
+                              stride=CONTINUOUS_STRIDE, duty=CONTINUOUS_DUTY,
+                              hazard_priority=tts_engine.PRIORITY_HAZARD,
+                              objects_priority=tts_engine.PRIORITY_OBJECTS,
+                              gate=FrameGate(stats=gate_stats), governor=governor)
+
 def main():
-    global yolo_model
-    
     print("=== Enhanced Camera Vision System ===")
     print("Combining YOLO v11 Object Detection + OCR + Text-to-Speech")
     print("=" * 50)
     
-    # Load YOLO model
-    yolo_model = load_yolo_model()
-    if yolo_model is None:
-        print("⚠️  Running without object detection (OCR only)")
+    # Load YOLO (imports PyTorch) and OCR in the background while the camera opens
+    readiness.load('detector', load_detector, required=False, on_ready=_set_yolo_model)
+    if OCR_PROCESSES > 0:
+        readiness.load('ocr', start_process_ocr().warm_up)
+    else:
+        readiness.load('ocr', ocr_engine.warm_up)
+    
+    # Reconnect to the last camera that worked, with the backend that worked
+    cap = None
+    last = camera_discovery.last_camera()
+    if last is not None:
+        print(f"🔁 Reconnecting to last camera {last['index']}...")
+        cap = open_camera_safely(last['index'], last['backend'])
     
-    # Try to auto-open Canon EOS virtual device first on Windows
-    camera_index = None
-    if platform.system() == 'Windows':
-        for name in KNOWN_VIRTUAL_DEVICE_NAMES:
+    # Otherwise try to auto-open Canon EOS virtual device first on Windows
+    camera = None
+    if cap is None and platform.system() == 'Windows':
+        for name in camera_discovery.KNOWN_VIRTUAL_DEVICE_NAMES:
             print(f"🔎 Looking for '{name}'...")
-            cap = _open_with_backends(f"video={name}")
-            if cap is not None and cap.isOpened():
+            camera = camera_discovery.probe(f"name:{name}")
+            if camera is not None:
                 print(f"✅ Found and selected '{name}'")
-                cap.release()
-                camera_index = f"name:{name}"
                 break
     
     # If not found, let user select from enumerated indices
-    if camera_index is None:
-        camera_index = select_camera()
-    
-    if camera_index is None:
-        print("No camera selected. Exiting...")
-        return
-    
-    # Open camera safely
-    cap = open_camera_safely(camera_index)
     if cap is None:
-        return
+        if camera is None:
+            camera = select_camera()
+        if camera is None:
+            print("No camera selected. Exiting...")
+            return
+        # Open camera safely
+        cap = open_camera_safely(camera['index'], camera['backend'])
+        if cap is None:
+            return
     
     print("\n🎮 Controls:")
     print("  SPACE - Capture and read text")
     print("  O     - Detect and describe objects")
     print("  B     - Both OCR and object detection")
+    print("  D     - Toggle continuous detection (announces changes only)")
     print("  ESC   - Exit")
     print("  C     - Change camera")
     print("  R     - Refresh camera list")
     
-    consecutive_errors = 0
-    max_errors = 5
+    stats = PipelineStats()
+    # Sentence-streamed speech; object announcements pre-empt text being read
+    speech = tts_engine.SpeechPlayer(on_first_audio=stats.add_speech_latency)
+    worker = InferenceWorker(process_job, speech, stats, priorities=JOB_PRIORITIES, governors=JOB_GOVERNORS)
+    grabber = FrameGrabber(cap, stats, governor=governor, ring=frame_ring)
+    continuous = None
+    open_windows = {}  # window name -> time at which to close it
+    last_seq = 0
+    last_report = time.time()
     
     while True:
-        ret, frame = cap.read()
-        
-        # Check if frame is valid
-        if not ret or frame is None or frame.size == 0:
-            consecutive_errors += 1
-            print(f"⚠️  Frame read error ({consecutive_errors}/{max_errors})")
-            
-            if consecutive_errors >= max_errors:
-                print("❌ Too many consecutive errors. Camera may be disconnected or in use.")
-                break
-            continue
+        if grabber.failed:
+            break
         
-        consecutive_errors = 0  # Reset error counter on successful frame
+        seq, frame, captured_at = grabber.latest()
         
-        # Check frame dimensions
-        if frame.shape[0] <= 0 or frame.shape[1] <= 0:
-            print("Error: Invalid frame dimensions")
-            break
+        # Show annotated results from the worker without blocking the preview
+        while not worker.displays.empty():
+            window_name, image = worker.displays.get_nowait()
+            cv2.imshow(window_name, image)
+            open_windows[window_name] = time.time() + 3
+        for window_name, close_at in list(open_windows.items()):
+            if time.time() >= close_at:
+                cv2.destroyWindow(window_name)
+                del open_windows[window_name]
         
-        # Display frame
-        cv2.imshow('Enhanced Vision System - SPACE:OCR, O:Objects, B:Both, ESC:Exit', frame)
+        # Display frame (only when the grabber has something new)
+        if frame is not None and seq != last_seq:
+            # Check frame dimensions
+            if frame.shape[0] <= 0 or frame.shape[1] <= 0:
+                print("Error: Invalid frame dimensions")
+                break
+            cv2.imshow('Enhanced Vision System - SPACE:OCR, O:Objects, B:Both, ESC:Exit', frame)
+            last_seq = seq
+            first_frame = readiness.mark('first_frame')
+            if first_frame is not None:
+                print(f"⏱️  First frame shown after {first_frame:.2f}s")
         key = cv2.waitKey(1) & 0xFF
         
+        if time.time() - last_report >= 30:
+            print(f"📈 {stats.summary()}")
+            print(f"📈 {gate_stats.summary()}")
+            print(f"📈 {governor.summary()}")
+            print(f"📈 {ocr_governor.summary()}")
+            last_report = time.time()
+        
         if key == 27:  # ESC
             break
+        elif key in (32, ord('o'), ord('b')) and frame is None:
+            continue
         elif key == 32:  # SPACE - OCR only
-            try:
-                print("\n📸 Processing image for text...")
-                # OCR
-                text = pytesseract.image_to_string(frame)
-                print("📝 Detected text:", text.strip())
-                if text.strip():
-                    speak_text(text)
-                else:
-                    print("❌ No text detected.")
-            except Exception as e:
-                print(f"❌ Error in OCR: {e}")
+            print("\n📸 Processing image for text...")
+            if not submit_frame(worker, grabber, 'ocr', seq, frame, captured_at):
+                print("⏳ Still working on the previous request")
         elif key == ord('o'):  # Object detection only
-            if yolo_model is None:
-                print("❌ YOLO model not loaded!")
+            if not detector_available():
                 continue
-            try:
-                print("\n🤖 Processing image for objects...")
-                # Object detection
-                annotated_frame = detect_objects(frame)
-                cv2.imshow('Object Detection', annotated_frame)
-                
-                # Get and speak detection summary
-                summary = get_detection_summary()
-                print(f"🎯 {summary}")
-                speak_text(summary)
-                
-                # Keep detection window open for 3 seconds
-                cv2.waitKey(3000)
-                cv2.destroyWindow('Object Detection')
-                
-            except Exception as e:
-                print(f"❌ Error in object detection: {e}")
+            print("\n🤖 Processing image for objects...")
+            if not submit_frame(worker, grabber, 'objects', seq, frame, captured_at):
+                print("⏳ Still working on the previous request")
         elif key == ord('b'):  # Both OCR and object detection
-            try:
-                print("\n🔍 Processing image for both text and objects...")
-                
-                # Object detection
-                if yolo_model is not None:
-                    annotated_frame = detect_objects(frame)
-                    cv2.imshow('Combined Detection', annotated_frame)
-                    
-                    # Get detection summary
-                    obj_summary = get_detection_summary()
-                    print(f"🎯 {obj_summary}")
-                else:
-                    annotated_frame = frame
-                    obj_summary = "No object detection available"
-                
-                # OCR
-                text = pytesseract.image_to_string(frame)
-                print("📝 Detected text:", text.strip())
-                
-                # Combine results
-                combined_result = ""
-                if obj_summary != "No objects detected" and obj_summary != "No object detection available":
-                    combined_result += obj_summary + ". "
-                if text.strip():
-                    combined_result += f"Text found: {text.strip()}"
-                
-                if combined_result:
-                    speak_text(combined_result)
-                else:
-                    print("❌ No text or objects detected.")
-                
-                # Keep window open for 3 seconds
-                cv2.waitKey(3000)
-                cv2.destroyWindow('Combined Detection')
-                
-            except Exception as e:
-                print(f"❌ Error in combined processing: {e}")
-        elif key == ord('c'):  # Change camera
-            print("\n🔄 Changing camera...")
-            cap.release()
-            cv2.destroyAllWindows()
-            
-            camera_index = select_camera()
-            if camera_index is None:
-                print("No camera selected. Exiting...")
-                return
-            
-            cap = open_camera_safely(camera_index)
-            if cap is None:
-                return
-            print("✅ Camera changed successfully!")
-        elif key == ord('r'):  # Refresh camera list
-            print("\n🔄 Refreshing camera list...")
+            print("\n🔍 Processing image for both text and objects...")
+            if not submit_frame(worker, grabber, 'both', seq, frame, captured_at):
+                print("⏳ Still working on the previous request")
+        elif key == ord('d'):  # Toggle continuous detection
+            if continuous is not None:
+                continuous.stop()
+                continuous = None
+                print("⏸️  Continuous detection off")
+            elif detector_available():
+                continuous = start_continuous(grabber, speech)
+        elif key in (ord('c'), ord('r')):  # Change camera / refresh camera list
+            print("\n🔄 Changing camera..." if key == ord('c') else "\n🔄 Refreshing camera list...")
+            if continuous is not None:
+                continuous.stop()
+                continuous = None
+            grabber.stop()
             cap.release()
             cv2.destroyAllWindows()
+            open_windows.clear()
             
-            camera_index = select_camera()
-            if camera_index is None:
+            # C revalidates the cached cameras, R rescans every index
+            camera = select_camera(refresh=key == ord('r'))
+            if camera is None:
                 print("No camera selected. Exiting...")
-                return
+                cap = None
+                break
             
-            cap = open_camera_safely(camera_index)
+            cap = open_camera_safely(camera['index'], camera['backend'])
             if cap is None:
-                return
-            print("✅ Camera refreshed successfully!")
+                break
+            grabber = FrameGrabber(cap, stats, governor=governor, ring=frame_ring)
+            last_seq = 0
+            print("✅ Camera changed successfully!" if key == ord('c') else "✅ Camera refreshed successfully!")
     
+    if continuous is not None:
+        continuous.stop()
+    grabber.stop()
+    worker.stop()
+    speech.stop()
     if cap:
         cap.release()
+    stop_process_ocr()
     cv2.destroyAllWindows()
+    print(f"📈 {stats.summary()}")
+    print(f"📈 {gate_stats.summary()}")
+    print(f"📈 {governor.summary()}")
+    print(f"📈 {ocr_governor.summary()}")
+    print(f"📈 {speech.summary()}")
     print("👋 Program terminated.")
 
 if __name__ == '__main__':
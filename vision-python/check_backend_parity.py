@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+from detector import DETECT_CONF, load_yolo_model, result_to_detections
+from tracker import iou_matrix
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def load_frames(images=None, video=None, limit=50):
+    """Frames from an image directory or a video file (every 10th frame)"""
+    frames = []
+    if images:
+        for name in sorted(os.listdir(images)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(images, name))
+                if frame is not None:
+                    frames.append(frame)
+            if len(frames) >= limit:
+                break
+    elif video:
+        cap = cv2.VideoCapture(video)
+        index = 0
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % 10 == 0:
+                frames.append(frame)
+            index += 1
+        cap.release()
+    return frames
+
+
+def run(model, frames, conf):
+    """Detections per frame and mean latency in ms"""
+    detections = []
+    start = time.perf_counter()
+    for frame in frames:
+        results = model(frame, conf=conf, verbose=False)
+        detections.append(result_to_detections(results[0], model.names))
+    return detections, (time.perf_counter() - start) * 1000 / max(1, len(frames))
+
+
+def match(reference, candidate, iou_threshold):
+    """Greedy same-class IoU matching; returns (pairs, unmatched_reference, unmatched_candidate)"""
+    if not reference or not candidate:
+        return [], len(reference), len(candidate)
+    ious = iou_matrix([d['bbox'] for d in reference], [d['bbox'] for d in candidate])
+    pairs = []
+    used_r, used_c = set(), set()
+    for r, c in sorted(((r, c) for r in range(len(reference)) for c in range(len(candidate))),
+                       key=lambda rc: -ious[rc]):
+        if ious[r, c] < iou_threshold:
+            break
+        if r in used_r or c in used_c or reference[r]['class'] != candidate[c]['class']:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        pairs.append((reference[r], candidate[c], float(ious[r, c])))
+    return pairs, len(reference) - len(pairs), len(candidate) - len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare an exported YOLO backend with the PyTorch model')
+    parser.add_argument('--backend', choices=('onnx', 'openvino'), default='onnx')
+    parser.add_argument('--model', help='Exported model path (default: next to the .pt weights)')
+    parser.add_argument('--images', help='Directory of test images')
+    parser.add_argument('--video', help='Video file to sample frames from')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--conf', type=float, default=DETECT_CONF)
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for two boxes to count as the same object')
+    parser.add_argument('--min-recall', type=float, default=0.9)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.video, args.limit)
+    if not frames:
+        print("❌ No frames to test - pass --images <dir> or --video <file>")
+        return False
+    print(f"=== Backend parity: torch vs {args.backend} on {len(frames)} frames ===")
+
+    reference_model = load_yolo_model('torch')
+    candidate_model = load_yolo_model(args.backend, args.model)
+    if reference_model is None or candidate_model is None:
+        return False
+
+    reference, reference_ms = run(reference_model, frames, args.conf)
+    candidate, candidate_ms = run(candidate_model, frames, args.conf)
+
+    matched = missed = extra = 0
+    conf_diffs, ious = [], []
+    for ref, cand in zip(reference, candidate):
+        pairs, m, e = match(ref, cand, args.iou)
+        matched += len(pairs)
+        missed += m
+        extra += e
+        conf_diffs.extend(abs(r['confidence'] - c['confidence']) for r, c, _ in pairs)
+        ious.extend(iou for _, _, iou in pairs)
+
+    recall = matched / (matched + missed) if matched + missed else 1.0
+    precision = matched / (matched + extra) if matched + extra else 1.0
+    print(f"Matched: {matched}, missed: {missed}, extra: {extra}")
+    print(f"Recall vs torch: {recall:.3f}, precision vs torch: {precision:.3f}")
+    if pairs_found := len(ious):
+        print(f"Mean IoU: {sum(ious) / pairs_found:.3f}, mean |Δconf|: {sum(conf_diffs) / pairs_found:.3f}")
+    print(f"Latency: torch {reference_ms:.1f} ms/frame, {args.backend} {candidate_ms:.1f} ms/frame")
+
+    if recall >= args.min_recall and precision >= args.min_recall:
+        print(f"✓ {args.backend} matches the PyTorch detections")
+        return True
+    print(f"✗ {args.backend} differs from PyTorch (threshold {args.min_recall})")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
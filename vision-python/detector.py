@@ -0,0 +1,190 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+import yolo_backends
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'model', 'yolo11n.pt')
+DETECT_CONF = 0.5
+
+# Inference backend: torch (ultralytics), onnx (onnxruntime) or openvino; see export_model.py
+DETECT_BACKEND = os.environ.get('DETECT_BACKEND', 'torch').lower()
+DETECT_MODEL = os.environ.get('DETECT_MODEL')  # defaults to the export next to MODEL_PATH
+DETECT_IMGSZ = int(os.environ.get('DETECT_IMGSZ', 640))
+
+# Micro-batching settings (override with environment variables)
+BATCH_WINDOW_MS = float(os.environ.get('DETECT_BATCH_WINDOW_MS', 5))
+MAX_BATCH = int(os.environ.get('DETECT_MAX_BATCH', 8))
+DETECT_QUEUE_SIZE = int(os.environ.get('DETECT_QUEUE_SIZE', 64))
+DETECT_TIMEOUT = float(os.environ.get('DETECT_TIMEOUT', 15))
+
+
+class DetectorBusyError(RuntimeError):
+    """Raised when the detection queue is full"""
+
+
+class DetectorTimeoutError(TimeoutError):
+    """Raised when a detection request does not finish within its timeout"""
+
+
+# Load YOLO model
+def load_yolo_model(backend=None, model_path=None, imgsz=None):
+    """Load YOLO v11 model with the configured backend (PyTorch is only imported for 'torch')"""
+    backend = (backend or DETECT_BACKEND).lower()
+    imgsz = imgsz or DETECT_IMGSZ
+    try:
+        model_path = model_path or DETECT_MODEL or yolo_backends.default_model_path(MODEL_PATH, backend)
+        if os.path.exists(model_path):
+            print(f"🤖 Loading YOLO model ({backend}, {imgsz}px) from: {model_path}")
+            if backend == 'torch':
+                from ultralytics import YOLO
+                model = YOLO(model_path)
+                model.overrides['imgsz'] = imgsz
+            else:
+                model = yolo_backends.load_exported(backend, model_path, imgsz)
+            print("✅ YOLO model loaded successfully!")
+            return model
+        else:
+            print(f"❌ YOLO model not found at: {model_path}")
+            print("Please ensure the model file exists in the correct location.")
+            if backend != 'torch':
+                print(f"Export it first: python export_model.py --format {backend}")
+            return None
+    except Exception as e:
+        print(f"❌ Error loading YOLO model: {e}")
+        return None
+
+
+def warm_up(model, size=DETECT_IMGSZ):
+    """Run one dummy inference so the first real request does not pay for lazy initialisation"""
+    model(np.zeros((size, size, 3), dtype=np.uint8), verbose=False)
+
+
+def _to_numpy(values):
+    """Copy a tensor to host memory as a NumPy array (arrays pass through)"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def result_to_detections(result, names, min_conf=None):
+    """Convert one YOLO result into the class/confidence/bbox dicts used across the app.
+
+    All boxes come off the device in a single transfer of `boxes.data`
+    (x1, y1, x2, y2, [track id,] conf, cls) and are filtered and converted
+    with NumPy instead of per-box tensor indexing.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+
+    data = _to_numpy(boxes.data)
+    confidences = data[:, -2]
+    if min_conf is not None:
+        data = data[confidences >= min_conf]
+        confidences = data[:, -2]
+
+    coords = data[:, :4].astype(np.int32).tolist()
+    classes = data[:, -1].astype(np.int32).tolist()
+    return [
+        {'class': names[cls], 'confidence': conf, 'bbox': tuple(bbox)}
+        for bbox, conf, cls in zip(coords, confidences.tolist(), classes)
+    ]
+
+
+class MicroBatcher:
+    """Gathers concurrent detection requests into one batched model call.
+
+    The first request opens a short window (BATCH_WINDOW_MS). Every request
+    that arrives before it closes, up to MAX_BATCH, goes through the model in
+    the same forward pass.
+    """
+
+    def __init__(self, model, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH,
+                 queue_size=DETECT_QUEUE_SIZE, timeout=DETECT_TIMEOUT, conf=DETECT_CONF):
+        self.model = model
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.timeout = timeout
+        self.conf = conf
+        self._requests = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = threading.Thread(target=self._loop, name='detect-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        future = Future()
+        try:
+            self._requests.put_nowait((future, frame))
+        except queue.Full:
+            raise DetectorBusyError(f"Detection queue is full ({self._requests.maxsize} pending)")
+        return future
+
+    @property
+    def queue_depth(self):
+        return self._requests.qsize()
+
+    def detect(self, frame, timeout=None):
+        """Detect objects in one frame, sharing a batch with concurrent callers"""
+        future = self.submit(frame)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise DetectorTimeoutError("Detection request timed out")
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [(f, frame) for f, frame in batch if f.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                results = self.model([frame for _, frame in batch], conf=self.conf, verbose=False)
+                for (future, _), result in zip(batch, results):
+                    future.set_result(result_to_detections(result, self.model.names))
+            except Exception as e:
+                for future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+_batcher = None
+_batcher_failed = False
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """Return the shared batcher, loading and warming up the model on first use (None if unavailable)"""
+    global _batcher, _batcher_failed
+    with _batcher_lock:
+        if _batcher is None and not _batcher_failed:
+            model = load_yolo_model()
+            if model is None:
+                _batcher_failed = True
+                return None
+            warm_up(model)
+            _batcher = MicroBatcher(model)
+            print(f"🤖 Detection batcher ready: window {BATCH_WINDOW_MS:g} ms, max batch {MAX_BATCH}")
+        return _batcher
+
+
+def queue_depth():
+    """Frames waiting for the detection batcher (None before it starts)"""
+    batcher = _batcher
+    return batcher.queue_depth if batcher is not None else None
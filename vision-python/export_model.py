@@ -0,0 +1,105 @@
+"""Export the YOLO detector for the PyTorch-free inference backends.
+
+Run once on a development machine (needs ultralytics/torch); the exported
+model is then loaded with DETECT_BACKEND=onnx or DETECT_BACKEND=openvino,
+which only need onnxruntime or openvino at runtime.
+
+Usage:
+    python export_model.py --format onnx [--imgsz 640] [--int8 --calib-dir path/to/images]
+    python export_model.py --format openvino [--imgsz 640] [--int8 --data coco8.yaml]
+
+The fine-tuned weights from model/finetune_Yolo.ipynb can be passed with
+--weights. Check the result against PyTorch with check_backend_parity.py.
+"""
+import argparse
+import os
+
+import cv2
+
+from detector import MODEL_PATH
+from yolo_backends import default_model_path, letterbox_batch
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+class CalibrationReader:
+    """Feeds letterboxed calibration images to onnxruntime static quantization"""
+
+    def __init__(self, input_name, image_dir, imgsz, limit):
+        paths = sorted(os.path.join(image_dir, f) for f in os.listdir(image_dir)
+                       if f.lower().endswith(IMAGE_EXTENSIONS))[:limit]
+        if not paths:
+            raise SystemExit(f"❌ No calibration images found in {image_dir}")
+        print(f"📊 Calibrating on {len(paths)} images")
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._paths = iter(paths)
+
+    def get_next(self):
+        for path in self._paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            batch, _, _ = letterbox_batch([image], self.imgsz)
+            return {self.input_name: cv2.dnn.blobFromImages(list(batch), 1 / 255.0, swapRB=True)}
+        return None
+
+
+def quantize_onnx(model_path, image_dir, imgsz, limit):
+    """Static INT8 (QDQ) quantization of an ONNX export; returns the new path"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    stem, _ = os.path.splitext(model_path)
+    prepared_path, int8_path = stem + '_prep.onnx', stem + '_int8.onnx'
+    quant_pre_process(model_path, prepared_path)
+    input_name = ort.InferenceSession(model_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    # Only convolutions/matmuls: the head concatenates pixel boxes with 0-1 scores,
+    # and one INT8 scale for both would wipe out the scores
+    quantize_static(prepared_path, int8_path, CalibrationReader(input_name, image_dir, imgsz, limit),
+                    quant_format=QuantFormat.QDQ, per_channel=True, op_types_to_quantize=['Conv', 'MatMul'],
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    os.remove(prepared_path)
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export YOLO for onnxruntime / OpenVINO')
+    parser.add_argument('--weights', default=MODEL_PATH, help='PyTorch weights (.pt)')
+    parser.add_argument('--format', choices=('onnx', 'openvino'), default='onnx')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size (multiple of 32)')
+    parser.add_argument('--static', action='store_true',
+                        help='Fixed batch size 1 (default exports a dynamic batch for micro-batching)')
+    parser.add_argument('--int8', action='store_true', help='Quantize weights and activations to INT8')
+    parser.add_argument('--calib-dir', help='Images for ONNX INT8 calibration (a few hundred from your domain)')
+    parser.add_argument('--calib-limit', type=int, default=300)
+    parser.add_argument('--data', default='coco8.yaml', help='Dataset YAML for OpenVINO INT8 calibration')
+    args = parser.parse_args()
+
+    if args.int8 and args.format == 'onnx' and not args.calib_dir:
+        parser.error('--int8 with --format onnx needs --calib-dir')
+
+    from ultralytics import YOLO
+
+    print(f"🤖 Exporting {args.weights} to {args.format} at {args.imgsz}px...")
+    model = YOLO(args.weights)
+    if args.format == 'onnx':
+        exported = model.export(format='onnx', imgsz=args.imgsz, dynamic=not args.static, simplify=True)
+        if args.int8:
+            exported = quantize_onnx(exported, args.calib_dir, args.imgsz, args.calib_limit)
+    else:
+        # ultralytics calibrates OpenVINO INT8 itself (NNCF) on the dataset's images
+        options = {'int8': True, 'data': args.data} if args.int8 else {}
+        exported = model.export(format='openvino', imgsz=args.imgsz, dynamic=not args.static, **options)
+
+    print(f"✅ Exported model: {exported}")
+    if os.path.abspath(exported) != os.path.abspath(default_model_path(args.weights, args.format)):
+        print(f"   Use it with: DETECT_BACKEND={args.format} DETECT_MODEL={exported}")
+    else:
+        print(f"   Use it with: DETECT_BACKEND={args.format}")
+    print(f"   Check parity: python check_backend_parity.py --backend {args.format} --images <dir>")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Gate thresholds (override with environment variables)
+GATE_DIFF_THRESHOLD = float(os.environ.get('GATE_DIFF_THRESHOLD', 8.0))    # grey-level change in any block
+GATE_BLUR_THRESHOLD = float(os.environ.get('GATE_BLUR_THRESHOLD', 40.0))   # Laplacian variance
+THUMB_SIZE = (128, 72)
+BLOCK_GRID = (16, 9)  # 8x8-pixel blocks of the thumbnail
+SHARPNESS_WIDTH = 320
+
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+BLURRY = 'blurry'
+
+
+class GateStats:
+    """Counts of gate decisions, shareable between several gates (and rolled up into `parent`)"""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.counts = {CHANGED: 0, UNCHANGED: 0, BLURRY: 0}
+
+    def add(self, state):
+        with self.lock:
+            self.counts[state] += 1
+        if self.parent is not None:
+            self.parent.add(state)
+
+    def as_dict(self):
+        with self.lock:
+            total = sum(self.counts.values())
+            skipped = self.counts[UNCHANGED] + self.counts[BLURRY]
+            return {**self.counts, 'total': total,
+                    'skipped_fraction': round(skipped / total, 4) if total else 0.0}
+
+    def summary(self):
+        d = self.as_dict()
+        return (f"frames gated: {d['total']}, skipped {d['skipped_fraction']:.0%} "
+                f"({d[UNCHANGED]} unchanged, {d[BLURRY]} blurry)")
+
+
+def sharpness(gray):
+    """Variance of the Laplacian on a fixed-width copy (low = motion blur / out of focus)"""
+    scale = SHARPNESS_WIDTH / gray.shape[1]
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.Laplacian(gray, cv2.CV_32F).var()
+
+
+def thumbnail(gray, dst=None):
+    """128x72 greyscale thumbnail used for change detection"""
+    return cv2.resize(gray, THUMB_SIZE, dst=dst, interpolation=cv2.INTER_AREA)
+
+
+def block_change(thumb, reference):
+    """Largest mean absolute difference of any block between two thumbnails"""
+    diff = cv2.absdiff(thumb, reference)
+    return cv2.resize(diff, BLOCK_GRID, interpolation=cv2.INTER_AREA).max()
+
+
+class FrameGate:
+    """Decides whether a frame is worth running OCR/YOLO on.
+
+    A frame is BLURRY when its sharpness is under `blur_threshold`, and
+    UNCHANGED when no block of its 128x72 greyscale thumbnail differs from the
+    last processed frame by `diff_threshold` on average. Comparing blocks
+    rather than the whole frame keeps a small new line of text from being
+    averaged away, while sensor noise still cancels out. Only CHANGED
+    frames become the new reference; callers keep the answer computed for it
+    in `last_result` so unchanged frames can reuse it.
+    """
+
+    def __init__(self, diff_threshold=GATE_DIFF_THRESHOLD, blur_threshold=GATE_BLUR_THRESHOLD,
+                 stats: GateStats = None):
+        self.diff_threshold = diff_threshold
+        self.blur_threshold = blur_threshold
+        self.stats = stats or GateStats()
+        self.last_result = None
+        self._reference = None
+        self._thumb = np.empty((THUMB_SIZE[1], THUMB_SIZE[0]), dtype=np.uint8)
+        self._lock = threading.Lock()
+
+    def check(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        with self._lock:
+            if self.blur_threshold > 0 and sharpness(gray) < self.blur_threshold:
+                state = BLURRY
+            else:
+                thumbnail(gray, dst=self._thumb)
+                if (self._reference is not None and
+                        block_change(self._thumb, self._reference) < self.diff_threshold):
+                    state = UNCHANGED
+                else:
+                    if self._reference is None:
+                        self._reference = np.empty_like(self._thumb)
+                    self._reference[...] = self._thumb
+                    state = CHANGED
+        self.stats.add(state)
+        return state
+
+    def reset(self):
+        with self._lock:
+            self._reference = None
+            self.last_result = None
+
+
+class SessionGates:
+    """One FrameGate per client session (LRU-bounded), all feeding shared stats"""
+
+    def __init__(self, max_sessions=256):
+        self.max_sessions = max_sessions
+        self.stats = GateStats()
+        self._gates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the gate for a session, creating it (and evicting the oldest) if needed"""
+        with self._lock:
+            gate = self._gates.get(session_id)
+            if gate is None:
+                gate = FrameGate(stats=self.stats)
+                self._gates[session_id] = gate
+                while len(self._gates) > self.max_sessions:
+                    self._gates.popitem(last=False)
+            else:
+                self._gates.move_to_end(session_id)
+            return gate
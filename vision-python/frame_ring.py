@@ -0,0 +1,214 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header: ring-wide fields, then per slot [seq, height, width, channels, pins] and captured_at
+RING_FIELDS = 4    # slots, capacity, latest_seq, dropped
+SLOT_FIELDS = 5
+SEQ, HEIGHT, WIDTH, CHANNELS, PINS = range(SLOT_FIELDS)
+WRITING = -1       # seq of a slot whose frame is being written
+
+
+class FrameLease:
+    """A pinned frame: `array` is a view into shared memory, valid until release()"""
+
+    def __init__(self, ring, slot, seq, array, captured_at):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.array = array
+        self.captured_at = captured_at
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.ring._unpin(self.slot)
+
+    def __enter__(self):
+        return self.array
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frames in shared memory with latest-frame semantics.
+
+    A writer (the camera thread, or a decoder) reserves the oldest slot that
+    is neither the newest frame nor pinned, fills it in place and publishes
+    it under the next sequence number; if every slot is pinned the frame is
+    dropped. Readers in any process pin a frame (latest or by seq) and get a
+    NumPy view of it, so nothing is copied or pickled; a pinned slot is never
+    overwritten. Frames may be any shape up to `max_shape` (e.g. after the
+    capture resolution changes).
+
+    Slot metadata is only touched under one small lock, so the ring can be
+    shared with child processes by passing it to them at creation (Process
+    args or a pool initializer); it pickles to an attach-by-name handle. The
+    creating process must call unlink() when done.
+    """
+
+    def __init__(self, slots=8, max_shape=(720, 1280, 3), lock=None, name=None, _shm=None):
+        if _shm is None:
+            capacity = int(np.prod(max_shape))
+            header = self._header_bytes(slots)
+            _shm = shared_memory.SharedMemory(name=name, create=True, size=header + slots * capacity)
+            self._owner = True
+        else:
+            self._owner = False
+        self._shm = _shm
+        # A spawn-context lock can be handed to both spawned and forked children
+        self._lock = lock if lock is not None else multiprocessing.get_context('spawn').Lock()
+        ring = np.ndarray(RING_FIELDS, np.int64, buffer=_shm.buf)
+        if self._owner:
+            ring[:] = (slots, capacity, 0, 0)
+        self.slots, self.capacity = int(ring[0]), int(ring[1])
+        self._ring = ring
+        self._meta = np.ndarray((self.slots, SLOT_FIELDS), np.int64, buffer=_shm.buf, offset=RING_FIELDS * 8)
+        self._times = np.ndarray(self.slots, np.float64, buffer=_shm.buf,
+                                 offset=(RING_FIELDS + self.slots * SLOT_FIELDS) * 8)
+        self._data_offset = self._header_bytes(self.slots)
+        if self._owner:
+            self._meta[:] = 0
+            self._times[:] = 0.0
+
+    @staticmethod
+    def _header_bytes(slots):
+        size = (RING_FIELDS + slots * SLOT_FIELDS + slots) * 8
+        return (size + 63) // 64 * 64  # keep frame data cache-line aligned
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @classmethod
+    def attach(cls, name, lock):
+        """Open a ring created by another process (with the lock it was created with)"""
+        return cls(lock=lock, _shm=shared_memory.SharedMemory(name=name))
+
+    def __reduce__(self):
+        return SharedFrameRing.attach, (self.name, self._lock)
+
+    # ---- Writer side ----
+
+    def slot_array(self, slot, shape):
+        """Writable view of a slot as `shape` (for filling a reserved slot in place)"""
+        if int(np.prod(shape)) > self.capacity:
+            raise ValueError(f"Frame {shape} is larger than the ring's {self.capacity} bytes per slot")
+        return np.ndarray(shape, np.uint8, buffer=self._shm.buf, offset=self._data_offset + slot * self.capacity)
+
+    def reserve(self):
+        """Claim the oldest free slot for writing; None if every slot is pinned or newest"""
+        with self._lock:
+            latest = self._ring[2]
+            free = [s for s in range(self.slots)
+                    if self._meta[s, PINS] == 0 and self._meta[s, SEQ] != WRITING
+                    and (self._meta[s, SEQ] != latest or latest == 0)]
+            if not free:
+                self._ring[3] += 1
+                return None
+            slot = min(free, key=lambda s: self._meta[s, SEQ])
+            self._meta[slot, SEQ] = WRITING
+            return slot
+
+    def publish(self, slot, shape, captured_at=None, pin=False):
+        """Make a filled slot the newest frame; returns its seq (and a lease when pin=True)"""
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 0
+        with self._lock:
+            seq = int(self._ring[2]) + 1
+            self._ring[2] = seq
+            self._meta[slot] = (seq, height, width, channels, 1 if pin else 0)
+            self._times[slot] = time.perf_counter() if captured_at is None else captured_at
+        if pin:
+            return FrameLease(self, slot, seq, self._view(slot, shape), float(self._times[slot]))
+        return seq
+
+    def abort(self, slot):
+        """Give back a reserved slot without publishing (e.g. the read failed)"""
+        with self._lock:
+            self._meta[slot, SEQ] = 0
+
+    def write(self, frame, captured_at=None, pin=False):
+        """Copy a frame into the ring; returns its seq (or lease with pin=True), None if the ring is full"""
+        slot = self.reserve()
+        if slot is None:
+            return None
+        try:
+            np.copyto(self.slot_array(slot, frame.shape), frame)
+        except Exception:
+            self.abort(slot)
+            raise
+        return self.publish(slot, frame.shape, captured_at, pin)
+
+    # ---- Reader side ----
+
+    def _view(self, slot, shape=None):
+        if shape is None:
+            height, width, channels = (int(v) for v in self._meta[slot, HEIGHT:PINS])
+            shape = (height, width, channels) if channels else (height, width)
+        view = self.slot_array(slot, shape)
+        view.flags.writeable = False
+        return view
+
+    def _find(self, seq):
+        hits = np.flatnonzero(self._meta[:, SEQ] == seq)
+        return int(hits[0]) if len(hits) else None
+
+    def pin(self, seq=None):
+        """Pin frame `seq` (default: the newest) and return a FrameLease, or None if it is gone"""
+        with self._lock:
+            seq = int(self._ring[2]) if seq is None else seq
+            slot = self._find(seq) if seq > 0 else None
+            if slot is None:
+                return None
+            self._meta[slot, PINS] += 1
+            captured_at = float(self._times[slot])
+        return FrameLease(self, slot, seq, self._view(slot), captured_at)
+
+    def _unpin(self, slot):
+        with self._lock:
+            self._meta[slot, PINS] -= 1
+
+    def view(self, seq):
+        """View of frame `seq` without pinning (the caller, or another process, must hold a pin)"""
+        with self._lock:
+            slot = self._find(seq)
+        return None if slot is None else self._view(slot)
+
+    def seq_of(self, array):
+        """Seq of the frame an array views into, or None if it is not a ring frame"""
+        if not isinstance(array, np.ndarray) or array.base is None:
+            return None
+        offset = array.__array_interface__['data'][0] - self.slot_array(0, (1,)).__array_interface__['data'][0]
+        if offset < 0 or offset % self.capacity or offset // self.capacity >= self.slots:
+            return None
+        with self._lock:
+            seq = int(self._meta[offset // self.capacity, SEQ])
+        return seq if seq > 0 else None
+
+    @property
+    def latest_seq(self):
+        with self._lock:
+            return int(self._ring[2])
+
+    def stats(self):
+        with self._lock:
+            return {'slots': self.slots, 'slot_bytes': self.capacity, 'latest_seq': int(self._ring[2]),
+                    'dropped': int(self._ring[3]), 'pinned': int((self._meta[:, PINS] > 0).sum())}
+
+    def close(self):
+        """Detach from the shared memory (views handed out must be gone by now)"""
+        self._ring = self._meta = self._times = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # A view is still alive; the mapping goes away with the process
+
+    def unlink(self):
+        """Free the shared memory (creator only, once every process has finished with it)"""
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Quality governor settings (override with environment variables)
+GOVERNOR_ENABLED = os.environ.get('GOVERNOR', '1') == '1'
+GOVERNOR_BUDGET_MS = float(os.environ.get('GOVERNOR_BUDGET_MS', 500))  # frame-to-result target (p90)
+GOVERNOR_HEADROOM = float(os.environ.get('GOVERNOR_HEADROOM', 0.6))    # raise quality below this share of the budget
+GOVERNOR_COOLDOWN = float(os.environ.get('GOVERNOR_COOLDOWN', 2.0))    # seconds between changes
+GOVERNOR_MIN_SAMPLES = int(os.environ.get('GOVERNOR_MIN_SAMPLES', 8))  # frames measured before deciding
+MAX_UPGRADE_WAIT = 60.0
+WINDOW = 256  # most recent samples kept per stage and for frames
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class Knob:
+    """One quality setting: `values` run from best quality to cheapest"""
+
+    def __init__(self, name, values, stages):
+        self.name = name
+        self.values = list(values)
+        self.stages = tuple(stages)
+        self.index = 0
+
+    @property
+    def value(self):
+        return self.values[self.index]
+
+    @property
+    def at_bottom(self):
+        return self.index == len(self.values) - 1
+
+    @property
+    def degradation(self):
+        return self.index / max(1, len(self.values) - 1)
+
+
+class QualityGovernor:
+    """Trades quality for speed at runtime to keep latency inside a budget.
+
+    Pipeline stages report their timings with observe(stage, seconds) and each
+    finished frame its end-to-end latency with observe_frame(seconds). Once
+    GOVERNOR_MIN_SAMPLES frames have been measured (and the cooldown since the
+    last change has passed), the p90 frame latency (`quantile`) is compared
+    with the budget:
+    over it, one knob that speeds up the slowest stage is stepped down (the
+    least degraded one first, so quality drops evenly); under `headroom` of
+    it, the most recent step down is undone. Upgrades that push latency back
+    over budget double the wait before the next upgrade, so the governor
+    settles instead of oscillating. Consumers read settings with value(name);
+    every change is printed and kept in `decisions`. Only the newest WINDOW
+    samples are kept, and nothing is recorded while disabled.
+    """
+
+    def __init__(self, budget_ms=GOVERNOR_BUDGET_MS, headroom=GOVERNOR_HEADROOM, cooldown=GOVERNOR_COOLDOWN,
+                 min_samples=GOVERNOR_MIN_SAMPLES, enabled=GOVERNOR_ENABLED, name='Governor', quantile=0.9):
+        self.name = name
+        self.quantile = quantile
+        self._label = f"p{round(quantile * 100)}"
+        self.budget = budget_ms / 1000.0
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self.knobs = {}
+        self.decisions = []
+        self._lock = threading.Lock()
+        self._frames = deque(maxlen=max(WINDOW, min_samples))
+        self._stages = {}
+        self._history = []  # knobs stepped down, most recent last
+        self._last_change = time.monotonic()
+        self._last_upgrade = None
+        self._upgrade_wait = cooldown
+        self._at_limit_logged = False
+
+    def add_knob(self, name, values, stages):
+        """Register a setting; `stages` are the stage names it makes faster"""
+        self.knobs[name] = Knob(name, values, stages)
+        return self
+
+    def value(self, name, default=None):
+        knob = self.knobs.get(name)
+        return default if knob is None else knob.value
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = deque(maxlen=WINDOW)
+            samples.append(seconds)
+
+    def observe_frame(self, seconds):
+        """Record one frame's end-to-end latency; may change a setting"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._frames.append(seconds)
+            if len(self._frames) < self.min_samples:
+                return
+            now = time.monotonic()
+            if now - self._last_change < self.cooldown:
+                return
+            latency = percentile(self._frames, self.quantile)
+            if latency > self.budget:
+                self._degrade(latency, now)
+            elif latency < self.budget * self.headroom and now - self._last_change >= self._upgrade_wait:
+                self._upgrade(latency, now)
+            else:
+                # In band: keep the settings and start a fresh window
+                self._reset_window(now, changed=False)
+
+    def _stage_p90s(self):
+        return {stage: percentile(samples, self.quantile) for stage, samples in self._stages.items() if samples}
+
+    def _degrade(self, latency, now):
+        stage_p90s = self._stage_p90s()
+        slowest = max(stage_p90s, key=stage_p90s.get) if stage_p90s else None
+        candidates = [k for k in self.knobs.values() if not k.at_bottom and slowest in k.stages]
+        candidates = candidates or [k for k in self.knobs.values() if not k.at_bottom]
+        if not candidates:
+            if not self._at_limit_logged:
+                self._log(f"already at lowest quality, {self._label} {latency * 1000:.0f} ms still over "
+                          f"budget {self.budget * 1000:.0f} ms")
+                self._at_limit_logged = True
+            self._reset_window(now, changed=False)
+            return
+        knob = min(candidates, key=lambda k: k.degradation)
+        # Latency went back over budget soon after an upgrade: wait longer before the next one
+        if self._last_upgrade is not None and now - self._last_upgrade < self._upgrade_wait * 2:
+            self._upgrade_wait = min(MAX_UPGRADE_WAIT, self._upgrade_wait * 2)
+        old = knob.value
+        knob.index += 1
+        self._history.append(knob)
+        stages = ', '.join(f"{s} {v * 1000:.0f} ms" for s, v in sorted(stage_p90s.items(), key=lambda s: -s[1]))
+        self._log(f"{knob.name} {old} → {knob.value} ({self._label} {latency * 1000:.0f} ms > budget "
+                  f"{self.budget * 1000:.0f} ms; {stages or 'no stage timings'})")
+        self._reset_window(now)
+
+    def _upgrade(self, latency, now):
+        if not self._history:
+            self._reset_window(now, changed=False)
+            return
+        knob = self._history.pop()
+        old = knob.value
+        knob.index -= 1
+        self._at_limit_logged = False
+        self._last_upgrade = now
+        self._log(f"{knob.name} {old} → {knob.value} ({self._label} {latency * 1000:.0f} ms < "
+                  f"{self.headroom:.0%} of budget {self.budget * 1000:.0f} ms)")
+        self._reset_window(now)
+
+    def _reset_window(self, now, changed=True):
+        self._frames.clear()
+        self._stages = {}
+        if changed:
+            self._last_change = now
+
+    def _log(self, message):
+        self.decisions.append((time.time(), message))
+        if len(self.decisions) > 1000:
+            del self.decisions[:500]
+        print(f"🎚️  {self.name}: {message}")
+
+    def settings(self):
+        return {name: knob.value for name, knob in self.knobs.items()}
+
+    def summary(self):
+        settings = ', '.join(f"{name} {value}" for name, value in self.settings().items())
+        state = 'on' if self.enabled else 'off'
+        return (f"{self.name.lower()} ({state}, budget {self.budget * 1000:.0f} ms): {settings}; "
+                f"{len(self.decisions)} decisions")
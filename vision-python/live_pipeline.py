@@ -0,0 +1,319 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from frame_gate import CHANGED
+
+
+def _stop_queue(q):
+    """Discard pending items and post the stop sentinel without blocking"""
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            break
+    q.put_nowait(None)
+
+
+class PipelineStats:
+    """Counters and latencies shared by the pipeline stages"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.jobs_dropped = 0
+        self.speech_latencies = []
+
+    def add_speech_latency(self, seconds):
+        with self.lock:
+            self.speech_latencies.append(seconds)
+            # Keep memory bounded on long sessions
+            if len(self.speech_latencies) > 1000:
+                del self.speech_latencies[:500]
+
+    def summary(self):
+        with self.lock:
+            latencies = sorted(self.speech_latencies)
+            parts = [
+                f"frames captured: {self.frames_captured}",
+                f"dropped (stale): {self.frames_dropped}",
+                f"jobs dropped (busy): {self.jobs_dropped}",
+            ]
+            if latencies:
+                mean = sum(latencies) / len(latencies)
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                parts.append(f"frame-to-first-audio: mean {mean * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+            return ', '.join(parts)
+
+
+class FrameGrabber:
+    """Reads the camera on its own thread and keeps only the newest frame.
+
+    Frames that are overwritten before anyone reads them are counted as
+    dropped, so slow consumers never build up a backlog of stale frames.
+    With a governor.QualityGovernor, its 'capture' (width, height) setting is
+    applied here, on the thread that owns the capture.
+
+    With a frame_ring.SharedFrameRing, frames are read straight into its
+    shared-memory slots and handed out as read-only views, so worker
+    processes can use them without copies. Call hold(seq) to keep a frame
+    from being overwritten while a job uses it.
+    """
+
+    def __init__(self, cap, stats: PipelineStats, max_errors=5, governor=None, ring=None):
+        self.cap = cap
+        self.stats = stats
+        self.max_errors = max_errors
+        self.governor = governor
+        self.ring = ring
+        self.failed = False
+        self._capture_size = None
+        self._ring_shape = None
+        self._frame = None
+        self._seq = 0
+        self._consumed_seq = 0
+        self._captured_at = 0.0
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='frame-grabber', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        consecutive_errors = 0
+        while self._running:
+            self._apply_capture_size()
+            if self.ring is not None:
+                ret, frame, ring_seq = self._read_into_ring()
+                if ret and frame is None:
+                    continue  # every slot is pinned; frame dropped (counted by the ring)
+            else:
+                ret, frame = self.cap.read()
+            if not ret or frame is None or frame.size == 0:
+                consecutive_errors += 1
+                print(f"⚠️  Frame read error ({consecutive_errors}/{self.max_errors})")
+                if consecutive_errors >= self.max_errors:
+                    print("❌ Too many consecutive errors. Camera may be disconnected or in use.")
+                    self.failed = True
+                    break
+                time.sleep(0.05)
+                continue
+            consecutive_errors = 0
+
+            with self._lock:
+                if self._seq > self._consumed_seq:
+                    self.stats.frames_dropped += 1
+                self._frame = frame
+                # With a ring, its sequence numbers identify frames (for hold)
+                self._seq = ring_seq if self.ring is not None else self._seq + 1
+                self._captured_at = time.perf_counter()
+                self.stats.frames_captured += 1
+
+    def _read_into_ring(self):
+        """cap.read() into a free ring slot; returns (ok, read-only view, seq)"""
+        slot = self.ring.reserve()
+        if slot is None:
+            self.cap.grab()  # keep the camera drained
+            return True, None, None
+        dst = self.ring.slot_array(slot, self._ring_shape) if self._ring_shape else None
+        ret, frame = self.cap.read(dst) if dst is not None else self.cap.read()
+        if not ret or frame is None or frame.size == 0:
+            self.ring.abort(slot)
+            return False, None, None
+        if dst is None or frame.ctypes.data != dst.ctypes.data:
+            # First frame or a new capture size: OpenCV allocated the image, so copy it in once
+            try:
+                np.copyto(self.ring.slot_array(slot, frame.shape), frame)
+            except ValueError as e:
+                self.ring.abort(slot)
+                print(f"⚠️  {e}")
+                return False, None, None
+            self._ring_shape = frame.shape
+        seq = self.ring.publish(slot, frame.shape)
+        return True, self.ring.view(seq), seq
+
+    def _apply_capture_size(self):
+        size = self.governor.value('capture') if self.governor is not None else None
+        if size is None or size == self._capture_size:
+            return
+        self._capture_size = size
+        try:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+        except Exception:
+            pass
+
+    def peek(self):
+        """Like latest(), but without marking the frame as consumed by the display"""
+        with self._lock:
+            return self._seq, self._frame, self._captured_at
+
+    def latest(self):
+        """Return (seq, frame, captured_at) for the newest frame, or (0, None, 0) before the first"""
+        with self._lock:
+            self._consumed_seq = self._seq
+            return self._seq, self._frame, self._captured_at
+
+    def hold(self, seq):
+        """Pin frame `seq` (or the newest, if it was overwritten) while a job uses it.
+
+        Returns a frame_ring.FrameLease, or None without a ring (frames are
+        then ordinary arrays that nothing overwrites).
+        """
+        if self.ring is None:
+            return None
+        return self.ring.pin(seq) or self.ring.pin()
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=2)
+
+
+class InferenceWorker:
+    """Runs OCR/detection jobs off the display thread.
+
+    `handler(kind, frame)` returns (speech_text, display) where display is an
+    optional (window_name, image) pair for the main thread to show. Speech
+    goes to a tts_engine.SpeechPlayer with the priority mapped from the job
+    kind, so e.g. an object warning can cut off a page being read. The job
+    queue is small on purpose: a key press while busy is dropped rather than
+    queued behind minutes of stale work. Each job's capture-to-result time
+    (up to the end of the handler, before speech is queued) is reported to
+    the governor `governors` maps its kind to, if any.
+    """
+
+    def __init__(self, handler: Callable, speech, stats: PipelineStats, priorities=None, max_pending=2,
+                 governors=None):
+        self.handler = handler
+        self.governors = governors or {}
+        self.speech = speech
+        self.priorities = priorities or {}
+        self.stats = stats
+        self.displays = queue.Queue()
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._loop, name='inference-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, frame, captured_at, release=None):
+        """Queue a job; `release` (e.g. a FrameLease's) is called once the frame is no longer needed"""
+        try:
+            self._jobs.put_nowait((kind, frame, captured_at, release))
+            return True
+        except queue.Full:
+            self.stats.jobs_dropped += 1
+            if release is not None:
+                release()
+            return False
+
+    def _loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            kind, frame, captured_at, release = job
+            try:
+                speech_text, display = self.handler(kind, frame)
+            except Exception as e:
+                print(f"❌ Error in {kind} processing: {e}")
+                continue
+            finally:
+                if release is not None:
+                    release()
+            governor = self.governors.get(kind)
+            if governor is not None:
+                governor.observe_frame(time.perf_counter() - captured_at)
+            if display is not None:
+                self.displays.put(display)
+            if speech_text:
+                self.speech.say(speech_text, priority=self.priorities.get(kind, 2), captured_at=captured_at)
+
+    def stop(self):
+        _stop_queue(self._jobs)
+        self._thread.join(timeout=2)
+
+
+class ContinuousDetector:
+    """Runs detection on a moving subset of frames and announces only changes.
+
+    At most one frame in `stride` is processed. The loop also waits so that
+    detection uses no more than `duty` of one core's time: the interval
+    stretches when inference is slow, so CPU-only hosts keep up at camera
+    rate by skipping frames. Tracker events, not raw detections, go to speech.
+    An optional frame_gate.FrameGate skips frames that are unchanged or blurred.
+    With a governor, its 'stride' setting replaces `stride` and each frame's
+    capture-to-result time is reported to it.
+    """
+
+    def __init__(self, grabber: FrameGrabber, detect_fn: Callable, tracker, speech,
+                 describe_fn: Callable, stride=2, duty=0.5, hazard_priority=0, objects_priority=1,
+                 gate=None, governor=None):
+        self.grabber = grabber
+        self.detect_fn = detect_fn
+        self.tracker = tracker
+        self.speech = speech
+        self.describe_fn = describe_fn
+        self.stride = max(1, stride)
+        self.duty = min(1.0, max(0.05, duty))
+        self.hazard_priority = hazard_priority
+        self.objects_priority = objects_priority
+        self.gate = gate
+        self.governor = governor
+        self.frames_processed = 0
+        self.last_inference = 0.0
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='continuous-detector', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        last_seq = 0
+        while self._running:
+            seq, frame, captured_at = self.grabber.peek()
+            stride = self.governor.value('stride', self.stride) if self.governor is not None else self.stride
+            if frame is None or seq - last_seq < stride:
+                time.sleep(0.005)
+                continue
+            last_seq = seq
+
+            # With a shared-memory ring, keep the frame from being overwritten while detecting
+            lease = self.grabber.hold(seq)
+            if lease is not None:
+                frame = lease.array
+            try:
+                # Nothing new to say about a static or smeared frame
+                if self.gate is not None and self.gate.check(frame) != CHANGED:
+                    continue
+
+                start = time.perf_counter()
+                detections = self.detect_fn(frame)
+            except Exception as e:
+                print(f"❌ Error in continuous detection: {e}")
+                detections = None
+            finally:
+                if lease is not None:
+                    lease.release()
+            if detections is None:
+                time.sleep(0.5)
+                continue
+            self.last_inference = time.perf_counter() - start
+            self.frames_processed += 1
+
+            text, is_hazard = self.describe_fn(self.tracker.update(detections))
+            if self.governor is not None:
+                self.governor.observe_frame(time.perf_counter() - captured_at)
+            if text:
+                print(f"🎯 {text}")
+                priority = self.hazard_priority if is_hazard else self.objects_priority
+                self.speech.say(text, priority=priority, captured_at=captured_at)
+
+            # Leave (1 - duty) of the time free for the rest of the app
+            idle = self.last_inference * (1.0 / self.duty - 1.0)
+            if idle > 0:
+                time.sleep(idle)
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=2)
@@ -0,0 +1,271 @@
+import collections
+import contextlib
+import os
+import sys
+import threading
+import time
+
+# Sampling profiler settings (override with environment variables)
+PROFILING_ENABLED = os.environ.get('API_PROFILING', '0') == '1'  # allow turning the profiler on at runtime
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 10))
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 120))
+
+# Stacks whose innermost frame is in one of these files are threads waiting for work
+IDLE_FILES = {'threading.py', 'queue.py', 'selectors.py', 'wasyncore.py', 'thread.py'}
+
+# Seconds; covers a cache hit (sub-millisecond) up to the API work timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values = collections.defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, rendered as Prometheus _bucket/_sum/_count series"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Collected(_Metric):
+    """Values read from elsewhere at scrape time: `collect()` returns a number or {label values: number}"""
+
+    def __init__(self, name, help_text, collect, metric_type='gauge', labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.type = metric_type
+        self.collect = collect
+
+    def _samples(self):
+        try:
+            values = self.collect()
+        except Exception:
+            return []  # A failing source must not break the whole scrape
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.labelnames, key if isinstance(key, tuple) else (key,))} "
+                f"{_format_value(value)}" for key, value in values.items()]
+
+
+class Registry:
+    """Metrics exposed together in the Prometheus text format (version 0.0.4)"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def collected(self, name, help_text, collect, metric_type='gauge', labelnames=()):
+        return self.register(Collected(name, help_text, collect, metric_type, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler for a running server.
+
+    While running, a background thread snapshots every other thread's Python
+    stack every `interval` seconds (sys._current_frames) and counts identical
+    stacks. Nothing is instrumented, so overhead is one stack walk per thread
+    per sample. Results are in the collapsed-stack format read by
+    flamegraph.pl and speedscope, plus a top-functions table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.interval = None
+        self.include_idle = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=PROFILE_INTERVAL_MS, seconds=PROFILE_MAX_SECONDS, include_idle=False):
+        """Start sampling (clears the previous profile); stops by itself after `seconds`"""
+        with self._lock:
+            if self.running:
+                return False
+            self.include_idle = include_idle
+            self.stacks = collections.Counter()
+            self.samples = 0
+            self.interval = max(0.001, interval_ms / 1000.0)
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(min(seconds, PROFILE_MAX_SECONDS),),
+                                            name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        return self.report()
+
+    def _run(self, seconds):
+        own = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not self.include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                thread_name = names.get(ident, str(ident)).rsplit('_', 1)[0]
+                self.stacks[(thread_name,) + tuple(reversed(stack))] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self):
+        """One 'thread;outer;...;inner count' line per distinct stack"""
+        stacks = list(self.stacks.items())
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in sorted(stacks, key=lambda s: -s[1]))
+
+    def report(self, top=25):
+        """Profile summary: functions by inclusive and self sample counts"""
+        inclusive, own = collections.Counter(), collections.Counter()
+        for stack, count in list(self.stacks.items()):
+            for function in set(stack[1:]):
+                inclusive[function] += count
+            if len(stack) > 1:
+                own[stack[-1]] += count
+        return {
+            'running': self.running,
+            'samples': self.samples,
+            'interval_ms': None if self.interval is None else self.interval * 1000,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'top_inclusive': inclusive.most_common(top),
+            'top_self': own.most_common(top),
+        }
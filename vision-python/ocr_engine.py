@@ -0,0 +1,503 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+import preprocessing
+import text_regions
+
+try:
+    import tesserocr
+except ImportError:  # Optional: falls back to pytesseract subprocesses
+    tesserocr = None
+
+# Tesseract path for Windows (pytesseract is imported on first use; tesserocr does not need it)
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+WINDOWS_TESSDATA = r'C:\Program Files\Tesseract-OCR\tessdata'
+
+# Worker pool settings (override with environment variables)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', os.cpu_count() or 2))
+OCR_QUEUE_SIZE = int(os.environ.get('OCR_QUEUE_SIZE', OCR_WORKERS * 4))
+OCR_TIMEOUT = float(os.environ.get('OCR_TIMEOUT', 15))
+
+
+class OCRBusyError(RuntimeError):
+    """Raised when the OCR queue is full and the request should be retried later"""
+
+
+class OCRTimeoutError(TimeoutError):
+    """Raised when a queued OCR request does not finish within its timeout"""
+
+
+class OCRUnavailableError(RuntimeError):
+    """Raised when no OCR worker could start an engine"""
+
+
+def parse_ocr_data(data, offset=(0, 0)):
+    """Build text, lines, word boxes and mean confidence from image_to_data output"""
+    dx, dy = offset
+    words = []
+    lines = []
+    confidences = []
+    current_key = None
+    current_words = []
+
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        if not word:
+            continue
+
+        conf = float(data['conf'][i])
+        left, top = int(data['left'][i]) + dx, int(data['top'][i]) + dy
+        width, height = int(data['width'][i]), int(data['height'][i])
+
+        words.append({
+            'text': word,
+            'confidence': conf,
+            'bbox': (left, top, left + width, top + height)
+        })
+        if conf > 0:
+            confidences.append(conf)
+
+        # Tesseract numbers lines within paragraphs within blocks
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if key != current_key:
+            if current_words:
+                lines.append(' '.join(current_words))
+            current_key = key
+            current_words = []
+        current_words.append(word)
+
+    if current_words:
+        lines.append(' '.join(current_words))
+
+    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+
+    return {
+        'text': '\n'.join(lines),
+        'lines': lines,
+        'words': words,
+        'confidence': avg_confidence
+    }
+
+
+def _pytesseract():
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
+
+
+def run_ocr(image, config='--psm 6'):
+    """Recognize an image with a single Tesseract pass (text, boxes and confidence together)"""
+    pytesseract = _pytesseract()
+    data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+    return parse_ocr_data(data)
+
+
+def _tessdata_path():
+    """Locate the tessdata directory for tesserocr handles"""
+    if os.environ.get('TESSDATA_PREFIX'):
+        return os.environ['TESSDATA_PREFIX']
+    if os.path.isdir(WINDOWS_TESSDATA):
+        return WINDOWS_TESSDATA
+    return None
+
+
+class _TesserocrEngine:
+    """A libtesseract handle that keeps eng.traineddata loaded between requests"""
+
+    def __init__(self, lang='eng'):
+        path = _tessdata_path()
+        if path:
+            self.api = tesserocr.PyTessBaseAPI(path=path, lang=lang)
+        else:
+            self.api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def recognize(self, image, psm):
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        if channels == 3:
+            image = image[:, :, ::-1].copy()  # Tesseract expects RGB
+        elif channels == 4:
+            image = np.ascontiguousarray(image[:, :, 2::-1])
+            channels = 3
+
+        self.api.SetPageSegMode(psm)
+        self.api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        self.api.Recognize()
+
+        # Collect words into the same layout as pytesseract's image_to_data
+        data = {key: [] for key in ('text', 'conf', 'left', 'top', 'width', 'height',
+                                    'block_num', 'par_num', 'line_num')}
+        iterator = self.api.GetIterator()
+        level = tesserocr.RIL.WORD
+        block = par = line = 0
+        for word in tesserocr.iterate_level(iterator, level):
+            try:
+                text = word.GetUTF8Text(level)
+            except RuntimeError:
+                break  # Empty page: the iterator has no words at all
+            if text is None:
+                continue
+            if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                block += 1
+            if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                par += 1
+            if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line += 1
+            x1, y1, x2, y2 = word.BoundingBox(level)
+            data['text'].append(text)
+            data['conf'].append(word.Confidence(level))
+            data['left'].append(x1)
+            data['top'].append(y1)
+            data['width'].append(x2 - x1)
+            data['height'].append(y2 - y1)
+            data['block_num'].append(block)
+            data['par_num'].append(par)
+            data['line_num'].append(line)
+        self.api.Clear()
+        return parse_ocr_data(data)
+
+    def close(self):
+        self.api.End()
+
+
+class _PytesseractEngine:
+    """Fallback engine: still launches the tesseract executable for every image"""
+
+    def __init__(self, lang='eng'):
+        # Fail when the worker starts, not on the first request, if tesseract or its language data is missing
+        languages = _pytesseract().get_languages()
+        if lang not in languages:
+            raise RuntimeError(f"Tesseract has no '{lang}' language data (found: {', '.join(languages) or 'none'})")
+
+    def recognize(self, image, psm):
+        return run_ocr(image, config=f'--psm {psm}')
+
+    def close(self):
+        pass
+
+
+class OCRWorkerPool:
+    """Pool of long-lived OCR workers fed from a bounded queue.
+
+    Each worker thread owns one engine handle for its whole life, so the
+    traineddata is loaded once per worker instead of once per request.
+    tesserocr releases the GIL while recognizing, so threads run in parallel.
+    A full queue raises OCRBusyError instead of letting requests pile up.
+    A worker whose tesserocr handle fails to load falls back to pytesseract;
+    if no worker starts at all, queued and new requests fail straight away
+    with OCRUnavailableError (and `error` says why).
+    """
+
+    def __init__(self, workers=OCR_WORKERS, queue_size=OCR_QUEUE_SIZE, timeout=OCR_TIMEOUT):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.engine_name = 'tesserocr' if tesserocr is not None else 'pytesseract'
+        self.error = None
+        self._tasks = queue.Queue(maxsize=max(1, queue_size))
+        self._failed_workers = 0
+        self._state_lock = threading.Lock()
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'ocr-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _create_engine(self):
+        if tesserocr is not None:
+            try:
+                return _TesserocrEngine()
+            except Exception as e:
+                print(f"⚠️  tesserocr failed to start ({e}); falling back to pytesseract")
+                self.engine_name = 'pytesseract'
+        return _PytesseractEngine()
+
+    def _worker(self):
+        try:
+            engine = self._create_engine()
+        except Exception as e:
+            print(f"❌ OCR worker failed to start: {e}")
+            with self._state_lock:
+                self._failed_workers += 1
+                if self._failed_workers == self.workers:
+                    self.error = e
+            if self.error is not None:
+                self._fail_queued()
+            return
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    break
+                future, image, psm = task
+                if not future.set_running_or_notify_cancel():
+                    continue  # Caller gave up while the task was queued
+                try:
+                    future.set_result(engine.recognize(image, psm))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            engine.close()
+
+    def _fail_queued(self):
+        """Fail every queued request (no worker is left to run them)"""
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if task is not None and task[0].set_running_or_notify_cancel():
+                task[0].set_exception(OCRUnavailableError(f"OCR engine failed to start: {self.error}"))
+
+    @property
+    def queue_depth(self):
+        return self._tasks.qsize()
+
+    def submit(self, image, psm=6, block=False):
+        """Queue an image for recognition and return a Future.
+
+        With block=True, wait up to the pool timeout for a queue slot instead
+        of failing straight away (for the remaining crops of a request that
+        has already been admitted).
+        """
+        if self.error is not None:
+            raise OCRUnavailableError(f"OCR engine failed to start: {self.error}")
+        future = Future()
+        try:
+            self._tasks.put((future, image, psm), block=block, timeout=self.timeout if block else None)
+        except queue.Full:
+            raise OCRBusyError(f"OCR queue is full ({self._tasks.maxsize} pending)")
+        if self.error is not None:
+            self._fail_queued()  # The last worker failed while we were queueing
+        return future
+
+    def recognize(self, image, psm=6, timeout=None):
+        """Recognize an image on the pool, waiting at most `timeout` seconds"""
+        future = self.submit(image, psm)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise OCRTimeoutError("OCR request timed out")
+
+    def close(self):
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide OCR worker pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OCRWorkerPool()
+            print(f"🔤 OCR worker pool started: {_pool.workers} x {_pool.engine_name}")
+            if tesserocr is None:
+                print("⚠️  tesserocr is not installed: every OCR call starts a tesseract process")
+        return _pool
+
+
+def queue_depth():
+    """Images waiting for an OCR worker (None before the pool starts)"""
+    pool = _pool
+    return pool.queue_depth if pool is not None else None
+
+
+def warm_up():
+    """Start the pool and OCR one blank image so the first real request finds Tesseract loaded"""
+    pool = get_pool()
+    pool.recognize(np.full((32, 128), 255, dtype=np.uint8))
+    return pool
+
+
+def empty_result():
+    return {'text': '', 'lines': [], 'words': [], 'confidence': 0}
+
+
+def _map_bbox(bbox, matrix):
+    """Enclosing box of a bbox's corners after a 2x3 affine transform"""
+    x1, y1, x2, y2 = bbox
+    corners = np.array([[x1, y1, 1], [x2, y1, 1], [x1, y2, 1], [x2, y2, 1]], dtype=np.float64) @ matrix.T
+    (left, top), (right, bottom) = corners.min(axis=0), corners.max(axis=0)
+    return int(np.floor(left)), int(np.floor(top)), int(np.ceil(right)), int(np.ceil(bottom))
+
+
+def merge_results(results, offsets, transforms=None):
+    """Combine per-region OCR results, mapping word boxes back into image coordinates.
+
+    `transforms` optionally holds, per result, the 2x3 affine map from the
+    preprocessed crop back to the original crop (e.g. after rescaling).
+    """
+    lines = []
+    words = []
+    for i, (result, (dx, dy)) in enumerate(zip(results, offsets)):
+        matrix = transforms[i] if transforms else None
+        lines.extend(result['lines'])
+        for word in result['words']:
+            bbox = word['bbox'] if matrix is None else _map_bbox(word['bbox'], matrix)
+            x1, y1, x2, y2 = bbox
+            words.append({**word, 'bbox': (x1 + dx, y1 + dy, x2 + dx, y2 + dy)})
+    confidences = [w['confidence'] for w in words if w['confidence'] > 0]
+    return {
+        'text': '\n'.join(lines),
+        'lines': lines,
+        'words': words,
+        'confidence': sum(confidences) / len(confidences) if confidences else 0
+    }
+
+
+# Above this share of the frame, one full-frame pass is cheaper than many crops
+FULL_FRAME_COVERAGE = 0.6
+
+
+def recognize_text(image, psm=6, preprocess=preprocessing.prepare_for_ocr, pool=None, block=False,
+                   max_regions=None):
+    """Find text regions first and OCR only those crops, in parallel on the pool.
+
+    Frames without text regions return an empty result without running
+    Tesseract at all. `preprocess` is applied per crop and returns either the
+    image to OCR or (image, matrix) with the 2x3 affine map back to the crop;
+    pass None to OCR the raw crops. With block=True even the first crop
+    waits for a queue slot (for work that was already admitted, e.g. a batch).
+    `max_regions` limits OCR to that many of the largest regions.
+    """
+    pool = pool or get_pool()
+    regions = text_regions.find_text_regions(image)
+    if not regions:
+        return empty_result()
+
+    height, width = image.shape[:2]
+    if text_regions.region_coverage(regions, image.shape) >= FULL_FRAME_COVERAGE:
+        regions = [(0, 0, width, height)]
+    elif max_regions and len(regions) > max_regions:
+        # Keep the largest regions, still in reading order
+        largest = set(sorted(regions, key=lambda r: (r[2] - r[0]) * (r[3] - r[1]), reverse=True)[:max_regions])
+        regions = [r for r in regions if r in largest]
+
+    futures = []
+    transforms = []
+    try:
+        for x1, y1, x2, y2 in regions:
+            crop = image[y1:y2, x1:x2]
+            prepared = preprocess(crop) if preprocess else crop
+            if isinstance(prepared, tuple):
+                prepared, matrix = prepared
+                transforms.append(matrix)
+            else:
+                transforms.append(None)
+            # Only the first crop may be rejected as busy; a frame with more
+            # regions than queue slots waits for the workers instead of failing
+            futures.append(pool.submit(prepared, psm, block=block or bool(futures)))
+    except OCRBusyError:
+        for future in futures:
+            future.cancel()
+        raise
+
+    results = []
+    try:
+        for future in futures:
+            results.append(future.result(timeout=pool.timeout))
+    except FutureTimeoutError:
+        for future in futures:
+            future.cancel()
+        raise OCRTimeoutError("OCR request timed out")
+    return merge_results(results, [(x1, y1) for x1, y1, _, _ in regions], transforms)
+
+
+# ---- OCR in worker processes on frames in shared memory ----
+
+# Set in each worker process by _init_process_worker
+_process_ring = None
+_process_pool = None
+
+
+def _init_process_worker(ring, threads):
+    global _process_ring, _process_pool
+    _process_ring = ring
+    _process_pool = OCRWorkerPool(workers=threads)
+
+
+def _recognize_shared(seq, psm, max_regions):
+    # The submitting process holds a pin on the frame until this returns
+    image = _process_ring.view(seq)
+    if image is None:
+        raise OCRTimeoutError("Frame left the ring before OCR started")
+    return recognize_text(image, psm=psm, pool=_process_pool, max_regions=max_regions)
+
+
+def _process_warm_up():
+    _process_pool.recognize(np.full((32, 128), 255, dtype=np.uint8))
+    return os.getpid()
+
+
+class ProcessOCRPool:
+    """Runs recognize_text in worker processes, so region finding, preprocessing
+    and result parsing scale past the GIL.
+
+    Frames travel through a frame_ring.SharedFrameRing: a frame that already
+    lives in the ring (e.g. from the camera grabber) is only pinned, anything
+    else is copied in once, and the worker reads it as a NumPy view. Only the
+    sequence number and the small result dict cross the process boundary.
+    When every ring slot is pinned, OCRBusyError is raised (or, with
+    block=True, the call waits for a slot).
+    """
+
+    def __init__(self, processes, ring, threads=1, timeout=OCR_TIMEOUT):
+        self.processes = max(1, processes)
+        self.ring = ring
+        self.timeout = timeout
+        # spawn: forking a process that already runs camera/OCR threads is unsafe
+        self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_process_worker, initargs=(ring, threads))
+
+    def warm_up(self):
+        """Start every worker process with Tesseract loaded"""
+        futures = [self._executor.submit(_process_warm_up) for _ in range(self.processes)]
+        pids = {future.result() for future in futures}
+        print(f"🔤 OCR worker processes started: {len(pids)} (shared-memory frames)")
+        return self
+
+    def _lease(self, image, block):
+        seq = self.ring.seq_of(image)
+        lease = self.ring.pin(seq) if seq is not None else None
+        deadline = time.monotonic() + self.timeout
+        while lease is None:
+            lease = self.ring.write(np.ascontiguousarray(image, dtype=np.uint8), pin=True)
+            if lease is not None:
+                break
+            if not block or time.monotonic() >= deadline:
+                raise OCRBusyError(f"All {self.ring.slots} shared frame slots are in use")
+            time.sleep(0.005)
+        return lease
+
+    def recognize(self, image, psm=6, max_regions=None, block=False):
+        """recognize_text() on a worker process; same result dict"""
+        lease = self._lease(image, block)
+        try:
+            future = self._executor.submit(_recognize_shared, lease.seq, psm, max_regions)
+        except Exception:
+            lease.release()
+            raise
+        # Keep the frame pinned until the worker is done with it, even if we stop waiting
+        future.add_done_callback(lambda _: lease.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise OCRTimeoutError("OCR request timed out")
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,113 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# OCR preprocessing settings (override with environment variables)
+TARGET_TEXT_HEIGHT = int(os.environ.get('OCR_TEXT_HEIGHT', 28))      # px; Tesseract is most accurate around here
+LOW_CONTRAST_STD = float(os.environ.get('OCR_LOW_CONTRAST', 30))     # grey-level std below which CLAHE is used
+MIN_SCALE, MAX_SCALE = 0.4, 3.0
+RESCALE_TOLERANCE = 0.2   # skip resizing when text is already within 20% of the target
+MIN_SKEW, MAX_SKEW = 1.0, 15.0  # degrees; larger angles are more likely layout than skew
+
+
+class _Scratch(threading.local):
+    """Per-thread reusable buffers, grown on demand, plus a CLAHE instance"""
+
+    def __init__(self):
+        self.buffers = {}
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+    def get(self, name, shape):
+        size = shape[0] * shape[1]
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.size < size:
+            buffer = np.empty(max(size, 1 << 20), dtype=np.uint8)
+            self.buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+
+_scratch = _Scratch()
+
+
+def _binarize(gray, low_contrast, dst=None):
+    """Dark text on white: Otsu, or CLAHE + adaptive threshold for faded/uneven images"""
+    if low_contrast:
+        enhanced = _scratch.get('clahe', gray.shape)
+        _scratch.clahe.apply(gray, dst=enhanced)
+        binary = cv2.adaptiveThreshold(enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                       cv2.THRESH_BINARY, 31, 10, dst=dst)
+    else:
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=dst)
+    # Text is the minority of pixels; invert light-on-dark signs
+    if cv2.countNonZero(binary) < binary.size // 2:
+        cv2.bitwise_not(binary, dst=binary)
+    return binary
+
+
+def estimate_text_height(binary):
+    """Median height of character-sized connected components (0 if none)"""
+    count, _, stats, _ = cv2.connectedComponentsWithStats(cv2.bitwise_not(binary), connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    keep = (heights >= 4) & (heights < binary.shape[0] * 0.9) & (widths < binary.shape[1] * 0.5)
+    return float(np.median(heights[keep])) if keep.any() else 0.0
+
+
+def estimate_skew(binary):
+    """Angle in degrees of the minimum-area rectangle around the text pixels"""
+    points = cv2.findNonZero(cv2.bitwise_not(binary))
+    if points is None or len(points) < 50:
+        return 0.0
+    # The angle convention differs between OpenCV versions; fold into [-45, 45)
+    angle = cv2.minAreaRect(points)[2]
+    return (angle + 45) % 90 - 45
+
+
+def prepare_for_ocr(image, text_height=TARGET_TEXT_HEIGHT):
+    """Normalize an image or text crop for Tesseract.
+
+    Converts to greyscale, rescales so characters are about `text_height`
+    pixels tall, corrects small skew and binarizes (CLAHE + adaptive
+    threshold only when contrast is low). Intermediates live in per-thread
+    scratch buffers; only the returned image is newly allocated, because it
+    is handed to an OCR worker thread.
+
+    Returns (binary, matrix) where matrix is the 2x3 affine transform from
+    the returned image back to the input's pixel coordinates.
+    """
+    if image.ndim == 2:
+        gray = image
+    else:
+        gray = _scratch.get('gray', image.shape[:2])
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if image.shape[2] == 3 else cv2.COLOR_BGRA2GRAY, dst=gray)
+
+    low_contrast = cv2.meanStdDev(gray)[1][0, 0] < LOW_CONTRAST_STD
+    probe = _binarize(gray, low_contrast, dst=_scratch.get('probe', gray.shape))
+
+    forward = np.eye(3)
+    measured = estimate_text_height(probe)
+    if measured:
+        scale = min(MAX_SCALE, max(MIN_SCALE, text_height / measured))
+        if abs(scale - 1.0) > RESCALE_TOLERANCE:
+            size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+            resized = _scratch.get('resized', (size[1], size[0]))
+            cv2.resize(gray, size, dst=resized,
+                       interpolation=cv2.INTER_CUBIC if scale > 1.0 else cv2.INTER_AREA)
+            gray = resized
+            forward[0, 0] = size[0] / image.shape[1]
+            forward[1, 1] = size[1] / image.shape[0]
+
+    binary = _binarize(gray, low_contrast)
+    cv2.medianBlur(binary, 3, dst=binary)
+
+    angle = estimate_skew(binary)
+    if MIN_SKEW <= abs(angle) <= MAX_SKEW:
+        height, width = binary.shape
+        rotation = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        binary = cv2.warpAffine(binary, rotation, (width, height), flags=cv2.INTER_NEAREST,
+                                borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+        forward = np.vstack([rotation, [0, 0, 1]]) @ forward
+
+    return binary, cv2.invertAffineTransform(forward[:2])
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from frame_gate import GATE_DIFF_THRESHOLD, block_change, thumbnail
+
+# Cache settings (override with environment variables)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+CACHE_MAX_MB = float(os.environ.get('CACHE_MAX_MB', 16))
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 30))
+CACHE_NEAR_DISTANCE = int(os.environ.get('CACHE_NEAR_DISTANCE', 0))  # dHash bits, 0 disables
+
+
+def bytes_digest(data) -> str:
+    """Exact key for an encoded upload (skips decoding when the same bytes come back)"""
+    return 'b:' + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def image_digest(image) -> str:
+    """Exact key for decoded pixels, including the shape"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(image.shape).encode())
+    h.update(np.ascontiguousarray(image).data)
+    return 'p:' + h.hexdigest()
+
+
+def dhash(image, size=8) -> int:
+    """64-bit difference hash: robust to noise, recompression and small shifts"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def near_signature(image):
+    """(dHash, thumbnail) pair used to match near-identical frames"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return dhash(gray), thumbnail(gray)
+
+
+class _Entry:
+    __slots__ = ('namespace', 'result', 'phash', 'thumb', 'session', 'shape', 'expires', 'size')
+
+    def __init__(self, namespace, result, phash, thumb, session, shape, expires, size):
+        self.namespace = namespace
+        self.result = result
+        self.phash = phash
+        self.thumb = thumb
+        self.session = session
+        self.shape = shape
+        self.expires = expires
+        self.size = size
+
+
+class ResultCache:
+    """LRU cache of OCR/detection results keyed by image content.
+
+    Lookups try an exact digest first. With `near_distance` > 0 (off by
+    default) a frame from a streaming session may also reuse the result of an
+    earlier frame from the same session whose perceptual hash (dHash) is
+    within `near_distance` bits, provided no block of their thumbnails
+    differs by `near_diff` or more; a 64-bit hash alone cannot tell two
+    labels with different text apart. Entries expire after `ttl` seconds;
+    total size is bounded by entry count and an estimate of result bytes.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+                 ttl=CACHE_TTL, near_distance=CACHE_NEAR_DISTANCE, near_diff=GATE_DIFF_THRESHOLD):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.near_distance = near_distance
+        self.near_diff = near_diff
+        self.size = 0
+        self.counters = {'hits': 0, 'near_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key=None, near=None, session=None, shape=None, count_miss=True):
+        """Return a cached result for the exact key or a near-duplicate in the session, else None"""
+        now = time.monotonic()
+        with self._lock:
+            if key is not None:
+                key = f"{namespace}:{key}"
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry.expires > now:
+                        self._entries.move_to_end(key)
+                        self.counters['hits'] += 1
+                        return entry.result
+                    self._remove(key)
+                    self.counters['expired'] += 1
+
+            if near is not None and session is not None and self.near_distance > 0:
+                phash, thumb = near
+                candidates = []
+                for k, entry in self._entries.items():
+                    if (entry.phash is None or entry.namespace != namespace or entry.session != session
+                            or entry.shape != shape or entry.expires <= now):
+                        continue
+                    distance = hamming(phash, entry.phash)
+                    if distance <= self.near_distance:
+                        candidates.append((distance, k))
+                # The hash only shortlists; the thumbnails must agree block by block
+                for _, k in sorted(candidates):
+                    entry = self._entries[k]
+                    if block_change(thumb, entry.thumb) < self.near_diff:
+                        self._entries.move_to_end(k)
+                        self.counters['near_hits'] += 1
+                        return entry.result
+
+            if count_miss:
+                self.counters['misses'] += 1
+            return None
+
+    def put(self, namespace, keys, result, near=None, session=None, shape=None):
+        """Store a result under one or more exact keys (the first also carries the near signature)"""
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl
+        phash, thumb = near if near is not None and session is not None and self.near_distance > 0 else (None, None)
+        with self._lock:
+            for i, key in enumerate(keys):
+                key = f"{namespace}:{key}"
+                if key in self._entries:
+                    self._remove(key)
+                first = i == 0
+                self._entries[key] = _Entry(namespace, result, phash if first else None, thumb if first else None,
+                                            session, shape, expires, size)
+                self.size += size
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters['evictions'] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['near_hits'] + self.counters['misses']
+            hit_rate = (self.counters['hits'] + self.counters['near_hits']) / lookups if lookups else 0.0
+            return {**self.counters, 'entries': len(self._entries), 'bytes': self.size,
+                    'hit_rate': round(hit_rate, 4)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
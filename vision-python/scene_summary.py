@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from tracker import iou_matrix
+
+# Scene summary settings (override with environment variables)
+SUMMARY_NMS_IOU = float(os.environ.get('SUMMARY_NMS_IOU', 0.7))   # overlap at which boxes are one object
+SUMMARY_MAX_ITEMS = int(os.environ.get('SUMMARY_MAX_ITEMS', 4))   # phrases spoken; the rest are counted
+
+# Apparent size (square root of the box's share of the frame) -> distance band
+CLOSE_SIZE = 0.35
+NEARBY_SIZE = 0.15
+
+NO_OBJECTS = "No objects detected"
+POSITION_PHRASES = {'left': 'on the left', 'ahead': 'ahead', 'right': 'on the right'}
+
+
+def nms(boxes, scores, iou_threshold=SUMMARY_NMS_IOU):
+    """Indices of the boxes kept by greedy NMS (highest score first), ignoring class"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores, dtype=np.float32), kind='stable')
+    ious = iou_matrix(boxes, boxes)
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= ious[i] > iou_threshold
+    return np.asarray(keep, dtype=np.intp)
+
+
+def analyze(detections, frame_shape, iou_threshold=SUMMARY_NMS_IOU):
+    """Where each detected object is, nearest first.
+
+    Overlapping boxes are merged across classes (the most confident label
+    wins), then position (left/ahead/right by box centre in thirds of the
+    frame) and distance band (close/nearby/far by apparent size) are computed
+    for all boxes at once. Returns copies of the detections with 'position',
+    'distance' and 'size' added.
+    """
+    if not detections:
+        return []
+    height, width = frame_shape[:2]
+    boxes = np.asarray([d['bbox'] for d in detections], dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray([d['confidence'] for d in detections], dtype=np.float32)
+    keep = nms(boxes, scores, iou_threshold)
+    boxes = boxes[keep]
+
+    centre_x = (boxes[:, 0] + boxes[:, 2]) / (2.0 * width)
+    positions = np.select([centre_x < 1 / 3, centre_x > 2 / 3], ['left', 'right'], 'ahead')
+    areas = np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+    sizes = np.sqrt(areas / float(width * height))
+    distances = np.select([sizes >= CLOSE_SIZE, sizes >= NEARBY_SIZE], ['close', 'nearby'], 'far')
+
+    objects = []
+    for i in np.argsort(-sizes, kind='stable'):
+        obj = dict(detections[keep[i]])
+        obj.update(position=str(positions[i]), distance=str(distances[i]), size=round(float(sizes[i]), 3))
+        objects.append(obj)
+    return objects
+
+
+def summarize(detections, frame_shape, max_items=SUMMARY_MAX_ITEMS):
+    """Short spoken description, nearest first: 'Person ahead, close. 2 chairs on the left, far.'"""
+    objects = analyze(detections, frame_shape)
+    if not objects:
+        return NO_OBJECTS
+
+    # Same class in the same place and band is one phrase; keeps nearest-first order
+    groups = {}
+    for obj in objects:
+        key = (obj['class'], obj['position'], obj['distance'])
+        groups[key] = groups.get(key, 0) + 1
+
+    phrases = []
+    for (name, position, distance), count in list(groups.items())[:max_items]:
+        label = name if count == 1 else f"{count} {name}s"
+        phrases.append(f"{label[0].upper()}{label[1:]} {POSITION_PHRASES[position]}, {distance}")
+    remaining = sum(list(groups.values())[max_items:])
+    if remaining:
+        phrases.append(f"{remaining} more object{'s' if remaining > 1 else ''}")
+    return '. '.join(phrases)
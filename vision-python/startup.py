@@ -0,0 +1,110 @@
+import threading
+import time
+
+# Measured from when this module is first imported (entry points import it first)
+PROCESS_START = time.perf_counter()
+
+LOADING = 'loading'
+READY = 'ready'
+UNAVAILABLE = 'unavailable'  # loader returned None, e.g. no YOLO model file
+FAILED = 'failed'
+
+
+class _Component:
+    def __init__(self, required):
+        self.required = required
+        self.state = LOADING
+        self.value = None
+        self.error = None
+        self.seconds = None
+        self.done = threading.Event()
+
+
+class Readiness:
+    """Loads models on background threads and tracks startup milestones.
+
+    `load(name, loader)` runs the loader on its own thread and records how
+    long it took; the app stays responsive meanwhile. Readiness (every
+    required component loaded) is separate from liveness: a process can be
+    up and serving /health while its models are still loading.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._milestones = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - PROCESS_START
+
+    def load(self, name, loader, required=True, on_ready=None):
+        """Start `loader()` in the background; `on_ready(value)` runs on that thread when it finishes"""
+        component = _Component(required)
+        with self._lock:
+            self._components[name] = component
+
+        def run():
+            start = time.perf_counter()
+            try:
+                component.value = loader()
+                component.state = READY if component.value is not None else UNAVAILABLE
+            except Exception as e:
+                component.error = str(e)
+                component.state = FAILED
+                print(f"❌ Failed to load {name}: {e}")
+            component.seconds = time.perf_counter() - start
+            if on_ready is not None and component.state == READY:
+                on_ready(component.value)
+            component.done.set()
+            self._check_ready()
+
+        threading.Thread(target=run, name=f'load-{name}', daemon=True).start()
+
+    def state(self, name):
+        """LOADING, READY, UNAVAILABLE or FAILED (None if nothing was registered under name)"""
+        component = self._components.get(name)
+        return component.state if component is not None else None
+
+    def wait(self, name, timeout=None):
+        """Block until a component has finished loading; returns its value (None if unavailable)"""
+        component = self._components.get(name)
+        if component is None or not component.done.wait(timeout):
+            return None
+        return component.value
+
+    def mark(self, milestone):
+        """Record the first time a milestone (e.g. 'first_frame') is reached; returns seconds since start"""
+        with self._lock:
+            if milestone not in self._milestones:
+                self._milestones[milestone] = self.elapsed()
+                return self._milestones[milestone]
+        return None
+
+    def is_ready(self):
+        """True once every required component has loaded (never before anything is registered)"""
+        components = list(self._components.values())
+        return bool(components) and all(c.done.is_set() and (c.state == READY or not c.required) for c in components)
+
+    def _check_ready(self):
+        if not all(c.done.is_set() for c in list(self._components.values())):
+            return
+        # A required component failed: record when loading finished, but never 'ready'
+        if self.mark('ready' if self.is_ready() else 'loaded') is not None:
+            print(f"⏱️  {self.summary()}")
+
+    def status(self):
+        return {
+            'ready': self.is_ready(),
+            'uptime_s': round(self.elapsed(), 3),
+            'components': {name: {'state': c.state, 'required': c.required,
+                                  'load_s': None if c.seconds is None else round(c.seconds, 3),
+                                  **({'error': c.error} if c.error else {})}
+                           for name, c in self._components.items()},
+            'milestones_s': {name: round(t, 3) for name, t in self._milestones.items()},
+        }
+
+    def summary(self):
+        parts = [f"{name} {t:.2f}s" for name, t in self._milestones.items()]
+        loads = [f"{name} {c.state} in {c.seconds:.2f}s" for name, c in self._components.items()
+                 if c.seconds is not None]
+        return f"Startup: {', '.join(parts)} ({'; '.join(loads)})"
@@ -0,0 +1,195 @@
+import itertools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+
+from frame_gate import BLURRY, UNCHANGED, FrameGate, GateStats
+from tracker import IoUTracker, describe_events
+
+# Streaming session limits (override with environment variables)
+STREAM_MAX_SESSIONS = int(os.environ.get('STREAM_MAX_SESSIONS', 8))
+STREAM_IDLE_TIMEOUT = float(os.environ.get('STREAM_IDLE_TIMEOUT', 60))
+STREAM_KEEPALIVE = 15  # seconds between SSE comments so proxies keep the stream open
+
+MODES = ('ocr', 'detect', 'both')
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when STREAM_MAX_SESSIONS sessions are already open"""
+
+
+class StreamSession:
+    """State for one live client: latest frame, gate, tracker and last results.
+
+    Frames are pushed with `push`; only the newest unprocessed frame is kept,
+    so a slow server drops stale frames instead of queueing them. A worker
+    thread runs `process(mode, payload, shape, gate)` on each frame and puts
+    only what changed (new text lines, tracker events) on the event queue.
+    Gate decisions are counted per session and also added to `gate_stats`.
+    """
+
+    def __init__(self, session_id, mode, process, gate_stats=None):
+        self.id = session_id
+        self.mode = mode
+        self.process = process
+        self.gate = FrameGate(stats=GateStats(parent=gate_stats))
+        self.tracker = IoUTracker()
+        self.events = queue.Queue(maxsize=64)
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.last_active = time.monotonic()
+        self.closed = False
+        self._lines = []
+        self._blurry = False
+        self._frame = None
+        self._seq = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name=f'stream-{session_id}', daemon=True)
+        self._thread.start()
+
+    def push(self, payload, shape=None):
+        """Replace the pending frame (payload must not be reused by the caller)"""
+        with self._cond:
+            if self._frame is not None:
+                self.frames_dropped += 1
+            self._frame = (next(self._seq), payload, shape)
+            self.frames_received += 1
+            self.last_active = time.monotonic()
+            self._cond.notify()
+        return self.frames_dropped
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._frame is None and not self.closed:
+                    self._cond.wait(timeout=1.0)
+                if self.closed:
+                    break
+                seq, payload, shape = self._frame
+                self._frame = None
+            try:
+                result = self.process(self.mode, payload, shape, self.gate)
+            except Exception as e:
+                self._emit({'type': 'error', 'seq': seq, 'error': str(e)})
+                continue
+            self.frames_processed += 1
+            self._publish(seq, result)
+
+    def _publish(self, seq, result):
+        """Emit only the parts of a result that differ from what the client already has"""
+        if result == BLURRY:
+            if not self._blurry:
+                self._emit({'type': 'blurry', 'seq': seq})
+            self._blurry = True
+            return
+        self._blurry = False
+        if result == UNCHANGED:
+            return
+
+        ocr, objects = result
+        if ocr is not None and ocr['lines'] != self._lines:
+            new_lines = [line for line in ocr['lines'] if line not in self._lines]
+            self._lines = ocr['lines']
+            self._emit({'type': 'ocr', 'seq': seq, 'text': ocr['text'], 'lines': ocr['lines'],
+                        'new_lines': new_lines, 'confidence': ocr['confidence']})
+        if objects is not None:
+            events = self.tracker.update(objects)
+            if events:
+                speech, hazard = describe_events(events)
+                self._emit({'type': 'detect', 'seq': seq, 'objects': objects, 'speech': speech,
+                            'hazard': hazard,
+                            'events': [{'event': kind, 'id': t.id, 'class': t.cls, 'bbox': t.bbox}
+                                       for kind, t in events]})
+
+    def _emit(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Client is not reading; keep the newest information
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                pass
+            self.events.put_nowait(event)
+
+    def sse(self):
+        """Generator of Server-Sent Events for this session; ends when it is closed or idle"""
+        yield f"event: ready\ndata: {json.dumps({'session_id': self.id, 'mode': self.mode})}\n\n"
+        last_sent = time.monotonic()
+        while not self.closed:
+            try:
+                event = self.events.get(timeout=1.0)
+            except queue.Empty:
+                if time.monotonic() - self.last_active > STREAM_IDLE_TIMEOUT:
+                    self.close()
+                    break
+                if time.monotonic() - last_sent >= STREAM_KEEPALIVE:
+                    last_sent = time.monotonic()
+                    yield ': keepalive\n\n'
+                continue
+            last_sent = time.monotonic()
+            yield f"data: {json.dumps(event)}\n\n"
+        yield 'event: closed\ndata: {}\n\n'
+
+    def stats(self):
+        return {'mode': self.mode, 'frames_received': self.frames_received,
+                'frames_dropped': self.frames_dropped, 'frames_processed': self.frames_processed,
+                'gate': self.gate.stats.as_dict()}
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class SessionRegistry:
+    """Open streaming sessions by id; idle ones are closed when new sessions are created"""
+
+    def __init__(self, process, max_sessions=STREAM_MAX_SESSIONS, gate_stats=None):
+        self.process = process
+        self.max_sessions = max_sessions
+        self.gate_stats = gate_stats
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError('Too many streaming sessions, please retry later')
+            session = StreamSession(secrets.token_urlsafe(12), mode, self.process, self.gate_stats)
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return None if session is None or session.closed else session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return session is not None
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if session.closed or now - session.last_active > STREAM_IDLE_TIMEOUT:
+                session.close()
+                del self._sessions[session_id]
+
+    def count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {session_id: s.stats() for session_id, s in self._sessions.items()}
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+# Detection runs on a downscaled copy; boxes are mapped back to full resolution
+DETECT_MAX_SIDE = 960
+PYRAMID_SIDES = (400, 200)  # coarser passes for large text
+MIN_REGION_HEIGHT = 8     # pixels at detection scale
+MIN_REGION_WIDTH = 12
+MIN_FILL_RATIO = 0.45     # share of closed edge pixels inside a candidate box
+MIN_EDGE_STRENGTH = 40    # minimum gradient magnitude for a text edge
+WORD_GAP = 12             # minimum horizontal gap (detection scale) still treated as the same line
+REGION_PADDING = 6        # pixels added around each crop at full resolution
+
+
+def _merge_boxes(boxes, gap_x=WORD_GAP, gap_y=2):
+    """Merge boxes that overlap or sit close on the same line, joining words into lines"""
+    merged = True
+    boxes = [list(b) for b in boxes]
+    while merged:
+        merged = False
+        out = []
+        while boxes:
+            x1, y1, x2, y2 = boxes.pop()
+            i = 0
+            while i < len(boxes):
+                bx1, by1, bx2, by2 = boxes[i]
+                # Word spacing grows with font size, so allow up to one line height
+                gx = max(gap_x, min(y2 - y1, by2 - by1))
+                if bx1 <= x2 + gx and bx2 >= x1 - gx and by1 <= y2 + gap_y and by2 >= y1 - gap_y:
+                    x1, y1, x2, y2 = min(x1, bx1), min(y1, by1), max(x2, bx2), max(y2, by2)
+                    boxes.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            out.append([x1, y1, x2, y2])
+        boxes = out
+    return [tuple(b) for b in boxes]
+
+
+def _candidate_boxes(gray, max_side):
+    """Text-like boxes found at one scale, in full-resolution coordinates"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    # Characters have strong local gradients; close them horizontally into words/lines
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    otsu, _ = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # A floor on edge strength keeps sensor noise and soft shading from passing as text
+    _, binary = cv2.threshold(gradient, max(otsu, MIN_EDGE_STRENGTH), 255, cv2.THRESH_BINARY)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+
+    # RETR_LIST so text inside a label border is still found; the border itself fails the fill test
+    contours, _ = cv2.findContours(connected, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    small_h = small.shape[0]
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < MIN_REGION_HEIGHT or w < MIN_REGION_WIDTH or w < h * 0.8:
+            continue
+        if h > small_h * 0.5:
+            continue  # Large blobs are objects/edges, not text lines
+        pixels = cv2.countNonZero(connected[y:y + h, x:x + w])
+        if pixels < MIN_FILL_RATIO * w * h:
+            # A skewed line fills its rotated rectangle, not its upright bounding box
+            (_, _), (rw, rh), _ = cv2.minAreaRect(contour)
+            if max(rw, rh) < 2 * min(rw, rh) or pixels < MIN_FILL_RATIO * rw * rh:
+                continue
+        boxes.append((x, y, x + w, y + h))
+
+    return [(int(x1 / scale), int(y1 / scale), int(np.ceil(x2 / scale)), int(np.ceil(y2 / scale)))
+            for x1, y1, x2, y2 in _merge_boxes(boxes)]
+
+
+def find_text_regions(image):
+    """Locate likely text regions with a gradient/morphology heuristic.
+
+    Returns (x1, y1, x2, y2) boxes in full-resolution coordinates, sorted in
+    reading order. An empty list means the frame very likely has no text and
+    OCR can be skipped.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape[:2]
+
+    # Strokes of large text (signs) are hollow outlines at full scale; coarser
+    # passes see them as solid lines, so take candidates from every scale
+    boxes = []
+    for side in (DETECT_MAX_SIDE,) + PYRAMID_SIDES:
+        boxes.extend(_candidate_boxes(gray, side))
+    if not boxes:
+        return []
+
+    pad = REGION_PADDING
+    regions = [(max(0, x1 - pad), max(0, y1 - pad), min(width, x2 + pad), min(height, y2 + pad))
+               for x1, y1, x2, y2 in _merge_boxes(boxes, gap_x=0, gap_y=0)]
+    regions.sort(key=lambda b: (b[1] // 20, b[0]))
+    return regions
+
+
+def region_coverage(regions, shape):
+    """Fraction of the image area covered by the regions (upper bound, overlaps counted twice)"""
+    area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+    return area / float(shape[0] * shape[1])
@@ -0,0 +1,134 @@
+import itertools
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def box_area(bbox):
+    x1, y1, x2, y2 = bbox
+    return max(0, x2 - x1) * max(0, y2 - y1)
+
+
+class Track:
+    def __init__(self, track_id, detection):
+        self.id = track_id
+        self.cls = detection['class']
+        self.bbox = detection['bbox']
+        self.confidence = detection['confidence']
+        self.hits = 1
+        self.missed = 0
+        self.confirmed = False
+        self.announced_area = box_area(self.bbox)
+
+
+class IoUTracker:
+    """Lightweight IoU tracker that keeps stable IDs across detection frames.
+
+    Detections are matched greedily to existing tracks of the same class by
+    IoU. A track is announced once it has been seen `min_hits` times and
+    dropped after `max_missed` detection frames without a match. `update`
+    returns only changes: ('appeared' | 'disappeared' | 'approaching', track).
+    """
+
+    def __init__(self, iou_threshold=0.3, min_hits=2, max_missed=5, approach_ratio=1.4):
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_missed = max_missed
+        self.approach_ratio = approach_ratio
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def update(self, detections):
+        events = []
+        matched_tracks = set()
+        unmatched = list(range(len(detections)))
+
+        if self.tracks and detections:
+            ious = iou_matrix([t.bbox for t in self.tracks], [d['bbox'] for d in detections])
+            # Only same-class pairs may match
+            same_class = np.array([[t.cls == d['class'] for d in detections] for t in self.tracks])
+            ious = np.where(same_class, ious, 0.0)
+
+            # Greedy assignment, best IoU first
+            for flat in np.argsort(-ious, axis=None):
+                ti, di = (int(i) for i in np.unravel_index(flat, ious.shape))
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di not in unmatched:
+                    continue
+                matched_tracks.add(ti)
+                unmatched.remove(di)
+                self._update_track(self.tracks[ti], detections[di], events)
+
+        survivors = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    if track.confirmed:
+                        events.append(('disappeared', track))
+                    continue
+            survivors.append(track)
+
+        for di in unmatched:
+            track = Track(next(self._ids), detections[di])
+            if self.min_hits <= 1:
+                track.confirmed = True
+                events.append(('appeared', track))
+            survivors.append(track)
+
+        self.tracks = survivors
+        return events
+
+    def _update_track(self, track, detection, events):
+        track.bbox = detection['bbox']
+        track.confidence = detection['confidence']
+        track.hits += 1
+        track.missed = 0
+        if not track.confirmed and track.hits >= self.min_hits:
+            track.confirmed = True
+            track.announced_area = box_area(track.bbox)
+            events.append(('appeared', track))
+        elif track.confirmed and box_area(track.bbox) >= track.announced_area * self.approach_ratio:
+            track.announced_area = box_area(track.bbox)
+            events.append(('approaching', track))
+
+    def reset(self):
+        self.tracks = []
+
+
+def _count_phrase(classes):
+    counts = {}
+    for name in classes:
+        counts[name] = counts.get(name, 0) + 1
+    return ', '.join(name if n == 1 else f"{n} {name}s" for name, n in counts.items())
+
+
+def describe_events(events):
+    """Turn tracker events into a short sentence; returns (text, is_hazard)"""
+    approaching = [t.cls for kind, t in events if kind == 'approaching']
+    appeared = [t.cls for kind, t in events if kind == 'appeared']
+    disappeared = [t.cls for kind, t in events if kind == 'disappeared']
+
+    parts = []
+    if approaching:
+        parts.append(f"{_count_phrase(approaching)} getting closer")
+    if appeared:
+        parts.append(f"New: {_count_phrase(appeared)}")
+    if disappeared:
+        parts.append(f"Gone: {_count_phrase(disappeared)}")
+    return '. '.join(parts), bool(approaching)
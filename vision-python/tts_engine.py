@@ -0,0 +1,516 @@
+import heapq
+import io
+import itertools
+import json
+import os
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+# Backend selection: 'auto', 'piper', 'espeak', 'sapi' (Windows) or 'gtts' (online)
+TTS_BACKEND = os.environ.get('TTS_BACKEND', 'auto')
+TTS_RATE = int(os.environ.get('TTS_RATE', 175))  # words per minute for espeak and SAPI
+PIPER_MODEL = os.environ.get('PIPER_MODEL', '')
+TTS_CACHE_MB = float(os.environ.get('TTS_CACHE_MB', 32))
+TTFA_TARGET_MS = float(os.environ.get('TTFA_TARGET_MS', 400))
+FIRST_CHUNK_CHARS = 60
+MAX_CHUNK_CHARS = 200
+
+# Speech priorities (lower is more urgent); a new utterance interrupts any
+# current one of the same or lower urgency
+PRIORITY_HAZARD = 0
+PRIORITY_OBJECTS = 1
+PRIORITY_TEXT = 2
+
+# Phrases worth having ready before the first announcement
+COMMON_PHRASES = [
+    "No objects detected",
+    "No object detection available",
+]
+
+
+class AudioClip:
+    """Synthesized speech held in memory (WAV/PCM for offline engines, MP3 for gTTS)"""
+
+    def __init__(self, data: bytes, fmt: str):
+        self.data = data
+        self.fmt = fmt
+
+    def __len__(self):
+        return len(self.data)
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels=1, sample_width=2) -> bytes:
+    """Wrap raw PCM samples in a WAV header, in memory"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class TTSBackend:
+    name = 'base'
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    def synthesize(self, text: str) -> AudioClip:
+        raise NotImplementedError
+
+
+class PiperBackend(TTSBackend):
+    """Offline neural voice: piper writes raw PCM to stdout"""
+    name = 'piper'
+
+    def __init__(self):
+        self.exe = shutil.which('piper')
+        self.model = PIPER_MODEL
+        self.sample_rate = 22050
+        config_path = self.model + '.json'
+        if os.path.exists(config_path):
+            with open(config_path, encoding='utf-8') as f:
+                self.sample_rate = json.load(f).get('audio', {}).get('sample_rate', self.sample_rate)
+
+    @classmethod
+    def available(cls):
+        return bool(shutil.which('piper') and PIPER_MODEL and os.path.exists(PIPER_MODEL))
+
+    def synthesize(self, text):
+        result = subprocess.run([self.exe, '--model', self.model, '--output-raw'],
+                                input=text.encode('utf-8'), capture_output=True, check=True)
+        return AudioClip(pcm_to_wav(result.stdout, self.sample_rate), 'wav')
+
+
+class EspeakBackend(TTSBackend):
+    """Offline formant voice: espeak-ng/espeak write a WAV to stdout"""
+    name = 'espeak'
+
+    def __init__(self):
+        self.exe = shutil.which('espeak-ng') or shutil.which('espeak')
+
+    @classmethod
+    def available(cls):
+        return bool(shutil.which('espeak-ng') or shutil.which('espeak'))
+
+    def synthesize(self, text):
+        result = subprocess.run([self.exe, '--stdout', '-s', str(TTS_RATE), text],
+                                capture_output=True, check=True)
+        return AudioClip(result.stdout, 'wav')
+
+
+class SapiBackend(TTSBackend):
+    """Offline Windows voice (SAPI through pywin32): speaks into a memory stream as 16-bit PCM"""
+    name = 'sapi'
+    SAMPLE_RATE = 22050
+    FORMAT_22KHZ_16BIT_MONO = 22  # SpeechAudioFormatType.SAFT22kHz16BitMono
+
+    def __init__(self):
+        self._local = threading.local()  # COM objects belong to the thread that created them
+
+    @classmethod
+    def available(cls):
+        if platform.system() != 'Windows':
+            return False
+        try:
+            import win32com.client  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _voice(self):
+        voice = getattr(self._local, 'voice', None)
+        if voice is None:
+            import pythoncom
+            import win32com.client
+            pythoncom.CoInitialize()
+            voice = win32com.client.Dispatch('SAPI.SpVoice')
+            # SAPI rate runs -10..10, 0 being roughly 180 words per minute
+            voice.Rate = max(-10, min(10, round((TTS_RATE - 180) / 20)))
+            self._local.voice = voice
+        return voice
+
+    def synthesize(self, text):
+        import win32com.client
+        voice = self._voice()
+        stream = win32com.client.Dispatch('SAPI.SpMemoryStream')
+        stream.Format.Type = self.FORMAT_22KHZ_16BIT_MONO
+        voice.AudioOutputStream = stream
+        voice.Speak(text)
+        return AudioClip(pcm_to_wav(bytes(stream.GetData()), self.SAMPLE_RATE), 'wav')
+
+
+class GTTSBackend(TTSBackend):
+    """Google TTS (needs network access); MP3 is kept in memory"""
+    name = 'gtts'
+
+    @classmethod
+    def available(cls):
+        try:
+            import gtts  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def synthesize(self, text):
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang='en', slow=False).write_to_fp(buffer)
+        return AudioClip(buffer.getvalue(), 'mp3')
+
+
+BACKENDS = {
+    'piper': PiperBackend,
+    'espeak': EspeakBackend,
+    'sapi': SapiBackend,
+    'gtts': GTTSBackend,
+}
+
+
+def create_backend(name=TTS_BACKEND) -> TTSBackend:
+    """Create the requested backend, or the best available one for 'auto'"""
+    if name != 'auto':
+        return BACKENDS[name]()
+    for backend_cls in (PiperBackend, EspeakBackend, SapiBackend, GTTSBackend):
+        if backend_cls.available():
+            return backend_cls()
+    raise RuntimeError("No text-to-speech backend available (install espeak-ng, piper, pywin32 or gTTS)")
+
+
+def _player_command(fmt):
+    """Find a command-line player that reads audio of this format from stdin"""
+    if fmt == 'wav':
+        players = [['aplay', '-q', '-'], ['paplay'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', '-i', '-']]
+    else:
+        players = [['mpg123', '-q', '-'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', '-i', '-']]
+    for command in players:
+        if shutil.which(command[0]):
+            return command
+    raise RuntimeError(f"No audio player found for {fmt} audio")
+
+
+class _MCIPlayback:
+    """Windows MP3 playback through MCI (winmm), which needs a file; kill() stops it"""
+
+    def __init__(self, data):
+        import ctypes
+        self._winmm = ctypes.windll.winmm
+        self._stopped = threading.Event()
+        self._alias = f'tts{threading.get_ident()}'
+        fd, self._path = tempfile.mkstemp(suffix='.mp3')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+    def _send(self, command, reply=None):
+        error = self._winmm.mciSendStringW(command, reply, 0 if reply is None else len(reply), None)
+        if error:
+            raise RuntimeError(f"MCI error {error} for '{command}'")
+
+    def play(self):
+        import ctypes
+        try:
+            self._send(f'open "{self._path}" type mpegvideo alias {self._alias}')
+            self._send(f'play {self._alias}')
+            mode = ctypes.create_unicode_buffer(32)
+            while not self._stopped.wait(0.05):
+                self._send(f'status {self._alias} mode', mode)
+                if mode.value != 'playing':
+                    break
+        finally:
+            self._winmm.mciSendStringW(f'close {self._alias}', None, 0, None)
+            os.remove(self._path)
+
+    def kill(self):
+        self._stopped.set()
+
+
+def play_clip(clip: AudioClip, on_process=None):
+    """Play a clip from memory (Windows MP3 without a command-line player goes through a temporary file).
+
+    `on_process` receives the player subprocess (or None when it exits) so
+    the caller can interrupt playback.
+    """
+    if platform.system() == 'Windows':
+        if clip.fmt == 'wav':
+            import winsound
+            winsound.PlaySound(clip.data, winsound.SND_MEMORY)
+            return
+        if not any(shutil.which(name) for name in ('mpg123', 'ffplay')):
+            playback = _MCIPlayback(clip.data)
+            if on_process:
+                on_process(playback)
+            try:
+                playback.play()
+            finally:
+                if on_process:
+                    on_process(None)
+            return
+
+    process = subprocess.Popen(_player_command(clip.fmt), stdin=subprocess.PIPE,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if on_process:
+        on_process(process)
+    try:
+        process.communicate(clip.data)
+    except (BrokenPipeError, OSError):
+        pass  # Player was killed mid-clip
+    finally:
+        if on_process:
+            on_process(None)
+
+
+class PhraseCache:
+    """LRU cache of synthesized clips, bounded by total audio bytes"""
+
+    def __init__(self, max_bytes=int(TTS_CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key, clip):
+        if len(clip) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._clips:
+                self.size -= len(self._clips.pop(key))
+            self._clips[key] = clip
+            self.size += len(clip)
+            while self.size > self.max_bytes:
+                _, evicted = self._clips.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class SpeechEngine:
+    """Synthesizes through a backend, caching repeated phrases, and plays from memory"""
+
+    def __init__(self, backend: TTSBackend, cache: PhraseCache = None):
+        self.backend = backend
+        self.cache = cache or PhraseCache()
+
+    def synthesize(self, text) -> AudioClip:
+        key = (self.backend.name, text)
+        clip = self.cache.get(key)
+        if clip is None:
+            clip = self.backend.synthesize(text)
+            self.cache.put(key, clip)
+        return clip
+
+    def speak(self, text):
+        play_clip(self.synthesize(text))
+
+    def prefetch(self, phrases):
+        """Synthesize phrases in the background so their first use is instant"""
+        def run():
+            for phrase in phrases:
+                try:
+                    self.synthesize(phrase)
+                except Exception as e:
+                    print(f"⚠️  Could not pre-synthesize '{phrase}': {e}")
+        threading.Thread(target=run, name='tts-prefetch', daemon=True).start()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SpeechEngine:
+    """Return the shared speech engine, creating it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SpeechEngine(create_backend())
+            print(f"🔊 Text-to-speech backend: {_engine.backend.name}")
+            _engine.prefetch(COMMON_PHRASES)
+        return _engine
+
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;])\s+|\n+')
+
+
+def _split_long(text, limit):
+    """Split text at commas, then spaces, so no piece is longer than limit"""
+    pieces = []
+    while len(text) > limit:
+        cut = text.rfind(', ', 0, limit)
+        if cut <= 0:
+            cut = text.rfind(' ', 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut + 1].strip())
+        text = text[cut + 1:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def split_sentences(text, first_chunk=FIRST_CHUNK_CHARS, max_chunk=MAX_CHUNK_CHARS):
+    """Split text into speakable chunks, keeping the first one short so audio starts quickly"""
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = ' '.join(sentence.split())
+        if sentence:
+            chunks.extend(_split_long(sentence, first_chunk if not chunks else max_chunk))
+    return chunks
+
+
+class Utterance:
+    def __init__(self, chunks, priority, requested_at, captured_at=None):
+        self.chunks = chunks
+        self.priority = priority
+        self.requested_at = requested_at
+        self.captured_at = captured_at
+        self.cancelled = False
+        self.started = False
+        self.finished = threading.Event()
+
+
+class SpeechPlayer:
+    """Streams speech sentence by sentence with priority pre-emption.
+
+    A synthesis thread turns chunks into audio while a playback thread plays
+    the ones already finished, so the first sentence is heard while the rest
+    are still being generated. A new utterance of the same or higher
+    priority cancels the current one (and anything less urgent still
+    waiting), killing the player process mid-clip where the platform allows.
+    """
+
+    def __init__(self, engine: SpeechEngine = None, lookahead=2, on_first_audio=None,
+                 ttfa_target_ms=TTFA_TARGET_MS):
+        self.engine = engine or get_engine()
+        self.on_first_audio = on_first_audio
+        self.ttfa_target = ttfa_target_ms / 1000.0
+        self.ttfa_samples = []
+        self._cond = threading.Condition()
+        self._pending = []  # heap of (priority, order, utterance)
+        self._order = itertools.count()
+        self._current = None
+        self._process = None
+        self._clips = queue.Queue(maxsize=lookahead)
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._synth_loop, name='speech-synth', daemon=True),
+            threading.Thread(target=self._play_loop, name='speech-play', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def say(self, text, priority=PRIORITY_TEXT, captured_at=None):
+        """Queue text for speech, pre-empting anything of equal or lower urgency"""
+        chunks = split_sentences(text)
+        if not chunks:
+            return
+        utterance = Utterance(chunks, priority, time.perf_counter(), captured_at)
+        with self._cond:
+            current = self._current
+            if current is not None and priority <= current.priority:
+                current.cancelled = True
+                self._interrupt_playback()
+            self._pending = [item for item in self._pending if item[0] < priority]
+            heapq.heapify(self._pending)
+            heapq.heappush(self._pending, (priority, next(self._order), utterance))
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            if self._current is not None:
+                self._current.cancelled = True
+            self._interrupt_playback()
+            self._cond.notify_all()
+
+    def _interrupt_playback(self):
+        process = self._process
+        if process is not None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def _set_process(self, process):
+        self._process = process
+
+    def _synth_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, _, utterance = heapq.heappop(self._pending)
+                self._current = utterance
+
+            for chunk in utterance.chunks:
+                if utterance.cancelled:
+                    break
+                try:
+                    clip = self.engine.synthesize(chunk)
+                except Exception as e:
+                    print(f"❌ Error in text-to-speech: {e}")
+                    print(f"📢 Text: {chunk}")
+                    continue
+                self._clips.put((utterance, chunk, clip))
+            self._clips.put((utterance, None, None))
+
+            # One utterance at a time keeps `_current` accurate for pre-emption
+            utterance.finished.wait()
+            with self._cond:
+                self._current = None
+
+    def _play_loop(self):
+        while True:
+            utterance, chunk, clip = self._clips.get()
+            if clip is None:
+                utterance.finished.set()
+                continue
+            if utterance.cancelled or not self._running:
+                continue
+
+            if not utterance.started:
+                utterance.started = True
+                self._record_first_audio(utterance)
+            try:
+                play_clip(clip, on_process=self._set_process)
+            except Exception as e:
+                print(f"❌ Error playing audio: {e}")
+                print(f"📢 Text: {chunk}")
+
+    def _record_first_audio(self, utterance):
+        now = time.perf_counter()
+        ttfa = now - utterance.requested_at
+        self.ttfa_samples.append(ttfa)
+        if len(self.ttfa_samples) > 1000:
+            del self.ttfa_samples[:500]
+        if ttfa > self.ttfa_target:
+            print(f"⚠️  Time to first audio {ttfa * 1000:.0f} ms (target {self.ttfa_target * 1000:.0f} ms)")
+        if self.on_first_audio and utterance.captured_at:
+            self.on_first_audio(now - utterance.captured_at)
+
+    def summary(self):
+        samples = sorted(self.ttfa_samples)
+        if not samples:
+            return "time to first audio: no samples"
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return f"time to first audio: median {samples[len(samples) // 2] * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
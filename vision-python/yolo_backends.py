@@ -0,0 +1,210 @@
+import ast
+import os
+
+import cv2
+import numpy as np
+
+# Exported-model inference settings (override with environment variables)
+DETECT_THREADS = int(os.environ.get('DETECT_THREADS', 0))  # 0 = runtime default
+NMS_IOU = 0.7      # same defaults as ultralytics predict
+MAX_DETECTIONS = 300
+PAD_VALUE = 114
+
+
+class _Boxes:
+    """Minimal stand-in for ultralytics Boxes: `data` rows are x1, y1, x2, y2, conf, cls"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _Result:
+    def __init__(self, data, names):
+        self.boxes = _Boxes(data)
+        self.names = names
+
+
+def letterbox_batch(frames, size):
+    """Resize frames into one padded (N, size, size, 3) uint8 batch; returns (batch, ratios, pads)"""
+    batch = np.full((len(frames), size, size, 3), PAD_VALUE, dtype=np.uint8)
+    ratios = np.empty(len(frames), dtype=np.float32)
+    pads = np.empty((len(frames), 2), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        height, width = frame.shape[:2]
+        ratio = min(size / height, size / width)
+        new_w, new_h = round(width * ratio), round(height * ratio)
+        left, top = (size - new_w) // 2, (size - new_h) // 2
+        batch[i, top:top + new_h, left:left + new_w] = cv2.resize(
+            frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        ratios[i] = ratio
+        pads[i] = (left, top)
+    return batch, ratios, pads
+
+
+def decode_predictions(output, ratios, pads, shapes, conf, iou=NMS_IOU, max_det=MAX_DETECTIONS):
+    """Turn raw (N, 4 + classes, anchors) YOLO output into per-image (K, 6) detection arrays"""
+    results = []
+    for i, pred in enumerate(output):
+        pred = pred.T  # (anchors, 4 + classes)
+        scores = pred[:, 4:]
+        classes = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), classes]
+        keep = confidences >= conf
+        if not keep.any():
+            results.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+        cxcywh, confidences, classes = pred[keep, :4], confidences[keep], classes[keep]
+
+        # Class-aware NMS on x, y, w, h boxes
+        xywh = cxcywh.copy()
+        xywh[:, :2] -= cxcywh[:, 2:] / 2
+        kept = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confidences.tolist(), classes.tolist(), conf, iou)
+        kept = np.asarray(kept, dtype=np.int64).reshape(-1)[:max_det]
+
+        # Undo the letterbox and clip to the original frame
+        boxes = np.empty((len(kept), 4), dtype=np.float32)
+        boxes[:, :2] = xywh[kept, :2]
+        boxes[:, 2:] = xywh[kept, :2] + xywh[kept, 2:]
+        boxes -= np.tile(pads[i], 2)
+        boxes /= ratios[i]
+        height, width = shapes[i]
+        np.clip(boxes, 0, [width, height, width, height], out=boxes)
+        results.append(np.column_stack([boxes, confidences[kept], classes[kept]]).astype(np.float32))
+    return results
+
+
+class ExportedYOLO:
+    """Runs an exported YOLO detector without PyTorch.
+
+    Called like an ultralytics model (`model(frames, conf=..., verbose=False)`)
+    and returns results whose `boxes.data` and `names` match, so the rest of
+    the app (result_to_detections, MicroBatcher) does not care which backend
+    is loaded. Subclasses implement `_infer` for one (N, 3, H, W) blob.
+    """
+
+    backend = None
+
+    def __init__(self, names, imgsz, batch_dims, dynamic_size=False):
+        self.names = names
+        self.imgsz = imgsz
+        self.dynamic_batch = batch_dims is None
+        self.dynamic_size = dynamic_size
+
+    def __call__(self, source, conf=0.25, verbose=False, imgsz=None, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        shapes = [frame.shape[:2] for frame in frames]
+        # A per-call imgsz (as in Ultralytics) only applies to exports with a dynamic input size
+        size = imgsz if imgsz and self.dynamic_size else self.imgsz
+        batch, ratios, pads = letterbox_batch(frames, size)
+        blob = cv2.dnn.blobFromImages(list(batch), 1 / 255.0, swapRB=True)
+        if self.dynamic_batch:
+            output = self._infer(blob)
+        else:
+            output = np.concatenate([self._infer(blob[i:i + 1]) for i in range(len(blob))])
+        return [_Result(data, self.names)
+                for data in decode_predictions(output, ratios, pads, shapes, conf)]
+
+    def _infer(self, blob):
+        raise NotImplementedError
+
+
+class OnnxYOLO(ExportedYOLO):
+    backend = 'onnx'
+
+    def __init__(self, path, imgsz):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if DETECT_THREADS:
+            options.intra_op_num_threads = DETECT_THREADS
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        if isinstance(height, int):
+            imgsz = height  # Static export: its size wins
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+        super().__init__(names, imgsz, batch if isinstance(batch, int) else None,
+                         dynamic_size=not isinstance(height, int))
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+def _unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"':
+        return value[1:-1]
+    return value
+
+
+def read_metadata_names(path):
+    """Class names from an ultralytics export's metadata.yaml, without needing PyYAML.
+
+    Only the `names:` mapping is read (one `index: name` per indented line).
+    """
+    names = {}
+    if not os.path.exists(path):
+        return names
+    in_names = False
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            if not line[0].isspace():
+                in_names = line.split(':', 1)[0].strip() == 'names'
+                continue
+            if in_names and ':' in line:
+                index, name = line.split(':', 1)
+                names[int(_unquote(index))] = _unquote(name)
+    return names
+
+
+class OpenVINOYOLO(ExportedYOLO):
+    backend = 'openvino'
+
+    def __init__(self, path, imgsz):
+        import openvino as ov
+
+        if os.path.isdir(path):
+            path = next(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.xml'))
+        core = ov.Core()
+        model = core.read_model(path)
+        shape = model.inputs[0].get_partial_shape()
+        if shape[2].is_static:
+            imgsz = shape[2].get_length()
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if DETECT_THREADS:
+            config['INFERENCE_NUM_THREADS'] = DETECT_THREADS
+        self.compiled = core.compile_model(model, 'CPU', config)
+        names = read_metadata_names(os.path.join(os.path.dirname(path), 'metadata.yaml'))
+        super().__init__(names, imgsz, shape[0].get_length() if shape[0].is_static else None,
+                         dynamic_size=not shape[2].is_static)
+
+    def _infer(self, blob):
+        return self.compiled(blob)[0]
+
+
+BACKENDS = {'onnx': OnnxYOLO, 'openvino': OpenVINOYOLO}
+
+
+def default_model_path(weights_path, backend):
+    """Where export_model.py writes the exported model for `backend`"""
+    stem, _ = os.path.splitext(weights_path)
+    if backend == 'onnx':
+        return stem + '.onnx'
+    if backend == 'openvino':
+        return stem + '_openvino_model'
+    return weights_path
+
+
+def load_exported(backend, path, imgsz):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown detection backend '{backend}' (choose torch, {', '.join(BACKENDS)})")
+    return BACKENDS[backend](path, imgsz)